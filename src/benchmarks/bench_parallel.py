@@ -0,0 +1,56 @@
+import argparse
+import time
+
+from benchmarks.bench_solvers import load_players
+from optimizer.optimizer import Optimizer
+
+### Scaling benchmark for parallel lineup generation.
+### Run from src/: python -m benchmarks.bench_parallel --lineups 213 --workers 1 2 4 8 16
+
+
+def bench_workers(num_workers, site, players, config, num_lineups, num_uniques, seed):
+    """
+    Generate num_lineups lineups with the given worker count and time the full run.
+    :return: Dictionary with the lineup count, wall time and lineups per second.
+    """
+    worker_config = dict(config, num_workers=num_workers, random_seed=seed)
+    optimizer = Optimizer(site, players, num_lineups, num_uniques, worker_config)
+
+    start = time.perf_counter()
+    lineups = optimizer.run()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "workers": num_workers,
+        "lineups": len(lineups),
+        "seconds": elapsed,
+        "lineups_per_second": len(lineups) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark parallel lineup generation.")
+    parser.add_argument("--site", default="dk")
+    parser.add_argument("--lineups", type=int, default=213)
+    parser.add_argument("--uniques", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    args = parser.parse_args()
+
+    players, config = load_players(args.site)
+    results = [
+        bench_workers(workers, args.site, players, config, args.lineups, args.uniques, args.seed)
+        for workers in args.workers
+    ]
+
+    baseline = results[0]["seconds"]
+    print(f"\n{'workers':<10}{'lineups':>10}{'seconds':>12}{'lineups/s':>12}{'speedup':>10}")
+    for result in results:
+        print(
+            f"{result['workers']:<10}{result['lineups']:>10}{result['seconds']:>12.2f}"
+            f"{result['lineups_per_second']:>12.2f}{baseline / result['seconds']:>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
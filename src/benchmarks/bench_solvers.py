@@ -0,0 +1,65 @@
+import argparse
+import time
+
+from data.data_manager import DataManager
+from optimizer.optimizer import Optimizer
+from optimizer.solvers import SOLVER_BACKENDS
+
+### Compare lineups per second across solver backends on the configured slate.
+### Run from src/: python -m benchmarks.bench_solvers --lineups 50
+
+
+def load_players(site):
+    data_manager = DataManager(site)
+    data_manager.load_player_data()
+    players = [
+        player for player in data_manager.players
+        if player.ownership not in [0, None] and player.id not in [0, None]
+    ]
+    return players, data_manager.config
+
+
+def bench_backend(backend, site, players, config, num_lineups, num_uniques, seed):
+    """
+    Generate num_lineups lineups with the given backend and time the full run. Every
+    backend samples its objectives from the same "random_seed", so they solve the same
+    problems.
+    :return: Dictionary with the lineup count, wall time and lineups per second.
+    """
+    backend_config = dict(config, solver_backend=backend, random_seed=seed)
+    optimizer = Optimizer(site, players, num_lineups, num_uniques, backend_config)
+
+    start = time.perf_counter()
+    lineups = optimizer.run()
+    elapsed = time.perf_counter() - start
+
+    return {
+        "backend": backend,
+        "lineups": len(lineups),
+        "seconds": elapsed,
+        "lineups_per_second": len(lineups) / elapsed if elapsed > 0 else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark optimizer solver backends.")
+    parser.add_argument("--site", default="dk")
+    parser.add_argument("--lineups", type=int, default=50)
+    parser.add_argument("--uniques", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--backends", nargs="+", default=list(SOLVER_BACKENDS))
+    args = parser.parse_args()
+
+    players, config = load_players(args.site)
+    results = [
+        bench_backend(backend, args.site, players, config, args.lineups, args.uniques, args.seed)
+        for backend in args.backends
+    ]
+
+    print(f"\n{'backend':<10}{'lineups':>10}{'seconds':>12}{'lineups/s':>12}")
+    for result in results:
+        print(f"{result['backend']:<10}{result['lineups']:>10}{result['seconds']:>12.2f}{result['lineups_per_second']:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+from pulp import lpSum
+
+from benchmarks.synthetic_slate import write_slate, scale_roster
+from data.data_manager import DataManager
+from lineups.lineup_metrics import calculate_exposure
+from optimizer.optimizer import Optimizer
+
+### End-to-end benchmark suite on synthetic slates. Results are written as JSON so runs
+### from different versions can be compared with --baseline.
+### Run from src/: python -m benchmarks.run_benchmarks --games 2 8 14 --lineups 50 --output bench.json
+
+
+def timed(fn, repeat=1):
+    """
+    Run fn repeat times.
+    :return: (result of the last call, list of elapsed seconds).
+    """
+    times = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return result, times
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], stderr=subprocess.DEVNULL, text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_scenarios(slate_dir, num_games, roster, num_lineups, num_uniques, seed, repeat):
+    """
+    Time every pipeline stage on one synthetic slate.
+    :return: Dictionary of scenario name -> {"seconds": [...], "min": ..., plus any counters}.
+    """
+    projection_path, player_id_path = write_slate(slate_dir, num_games, roster, seed)
+    results = {}
+
+    def load():
+        data_manager = DataManager("dk")
+        data_manager.config["projection_path"] = projection_path
+        data_manager.config["player_path"] = player_id_path
+        data_manager.load_player_data()
+        return data_manager
+
+    data_manager, times = timed(load, repeat)
+    results["load_player_data"] = {"seconds": times}
+
+    players = [
+        player for player in data_manager.players
+        if player.ownership not in [0, None] and player.id not in [0, None]
+    ]
+    config = dict(data_manager.config, random_seed=seed, num_workers=1)
+
+    optimizer = Optimizer("dk", players, num_lineups, num_uniques, config)
+    constraint_manager, times = timed(lambda: optimizer.build_problem("Benchmark"), repeat)
+    results["constraint_build"] = {"seconds": times, **constraint_manager.model_size()}
+
+    def stage1():
+        optimizer.build_problem("Benchmark_Stage1")
+        optimizer.problem.setObjective(
+            lpSum(player.fpts * var for (player, _), var in optimizer.lp_variables.items())
+        )
+        return optimizer.solver.solve(optimizer.problem)
+
+    status, times = timed(stage1, repeat)
+    results["stage1_solve"] = {"seconds": times, "status": status}
+
+    lineups, times = timed(lambda: Optimizer("dk", players, num_lineups, num_uniques, config).run())
+    results["lineup_loop"] = {
+        "seconds": times,
+        "lineups": len(lineups),
+        "lineups_per_second": len(lineups) / times[0] if times[0] > 0 else 0.0,
+    }
+
+    _, times = timed(lambda: calculate_exposure(lineups, players), repeat)
+    results["calculate_exposure"] = {"seconds": times}
+
+    export_path = os.path.join(slate_dir, "lineups.csv")
+    _, times = timed(lambda: lineups.export_to_csv(export_path, site="dk"), repeat)
+    results["export_to_csv"] = {"seconds": times}
+
+    for result in results.values():
+        result["min"] = min(result["seconds"])
+    return {"games": num_games, "players": len(players), "scenarios": results}
+
+
+def compare(results, baseline):
+    """
+    Print the min time of each scenario against a baseline results file.
+    """
+    baseline_runs = {run["games"]: run for run in baseline["runs"]}
+    print(f"\n{'games':<7}{'scenario':<22}{'baseline s':>12}{'current s':>12}{'ratio':>8}")
+    for run in results["runs"]:
+        previous = baseline_runs.get(run["games"])
+        if previous is None:
+            continue
+        for name, scenario in run["scenarios"].items():
+            if name not in previous["scenarios"]:
+                continue
+            before = previous["scenarios"][name]["min"]
+            after = scenario["min"]
+            ratio = after / before if before > 0 else float("nan")
+            print(f"{run['games']:<7}{name:<22}{before:>12.4f}{after:>12.4f}{ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the end-to-end benchmark suite on synthetic slates.")
+    parser.add_argument("--games", type=int, nargs="+", default=[2, 8, 14])
+    parser.add_argument("--players-per-team", type=int, default=None)
+    parser.add_argument("--lineups", type=int, default=50)
+    parser.add_argument("--uniques", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions of the fast scenarios.")
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", default=None, help="Previous results JSON to compare against.")
+    args = parser.parse_args()
+
+    roster = scale_roster(args.players_per_team) if args.players_per_team else None
+    results = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "parameters": vars(args),
+        "runs": [],
+    }
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_games in args.games:
+            print(f"Benchmarking {num_games}-game slate...")
+            slate_dir = os.path.join(tmp_dir, f"{num_games}_games")
+            results["runs"].append(
+                run_scenarios(slate_dir, num_games, roster, args.lineups, args.uniques, args.seed, args.repeat)
+            )
+
+    with open(args.output, "w") as file:
+        json.dump(results, file, indent=2)
+    print(f"Benchmark results written to {args.output}")
+
+    for run in results["runs"]:
+        summary = ", ".join(f"{name} {scenario['min']:.4f}s" for name, scenario in run["scenarios"].items())
+        print(f"{run['games']} games / {run['players']} players: {summary}")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            compare(results, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
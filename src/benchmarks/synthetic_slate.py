@@ -0,0 +1,132 @@
+import argparse
+import csv
+import os
+
+import numpy as np
+
+### Synthetic slate generator writing projections.csv / player_ids.csv shaped files.
+### Run from src/: python -m benchmarks.synthetic_slate --games 14 --out ../data/synthetic
+
+# Players per team by position and (min, max) salary per position
+DEFAULT_ROSTER = {"QB": 2, "RB": 4, "WR": 6, "TE": 3, "DST": 1}
+SALARY_RANGES = {
+    "QB": (4800, 8500),
+    "RB": (4000, 9000),
+    "WR": (3000, 9000),
+    "TE": (2500, 7500),
+    "DST": (2000, 4000),
+}
+KICKOFFS = ["01:00PM", "04:05PM", "04:25PM", "08:20PM"]
+
+PROJECTION_COLUMNS = [
+    "Name", "Pos", "Team", "Opp", "Salary", "STDV", "Floor", "Ceiling",
+    "Boom", "Bust", "Optimal", "Hero Own", "User Proj.",
+]
+PLAYER_ID_COLUMNS = [
+    "Position", "Name + ID", "Name", "ID", "Roster Position", "Salary", "Game Info", "TeamAbbrev", "AvgPointsPerGame",
+]
+
+
+def generate_slate(num_games, roster=None, seed=0):
+    """
+    Generate a synthetic DK NFL slate.
+    :param num_games: Number of games on the slate.
+    :param roster: Players per team by position, defaults to DEFAULT_ROSTER.
+    :param seed: Seed for the random generator.
+    :return: (projection rows, player id rows) as lists of dictionaries.
+    """
+    roster = roster or DEFAULT_ROSTER
+    rng = np.random.default_rng(seed)
+    projections, player_ids = [], []
+    next_id = 40000000
+
+    for game in range(num_games):
+        home, away = f"H{game:02d}", f"A{game:02d}"
+        game_info = f"{away}@{home} 12/29/2024 {KICKOFFS[game % len(KICKOFFS)]} ET"
+
+        for team, opp, opp_prefix in ((home, away, "vs"), (away, home, "@")):
+            for pos, count in roster.items():
+                low, high = SALARY_RANGES[pos]
+                salaries = np.sort(rng.integers(low // 100, high // 100 + 1, size=count) * 100)[::-1]
+                for depth, salary in enumerate(salaries):
+                    fpts = max(1.0, salary / 1000 * rng.uniform(2.0, 3.0) - depth)
+                    stddev = fpts * rng.uniform(0.35, 0.6)
+                    ownership = round(max(0.1, rng.gamma(2.0, 4.0) * salary / high), 2)
+                    name = f"{team} {pos}{depth + 1}"
+
+                    projections.append({
+                        "Name": name,
+                        "Pos": pos,
+                        "Team": team,
+                        "Opp": f"{opp_prefix} {opp}",
+                        "Salary": int(salary),
+                        "STDV": round(stddev, 2),
+                        "Floor": round(max(0.0, fpts - stddev), 2),
+                        "Ceiling": round(fpts + stddev, 2),
+                        "Boom": round(rng.uniform(5, 30), 2),
+                        "Bust": round(rng.uniform(30, 60), 2),
+                        "Optimal": round(rng.uniform(0, 25), 2),
+                        "Hero Own": ownership,
+                        "User Proj.": round(fpts, 2),
+                    })
+                    player_ids.append({
+                        "Position": pos,
+                        "Name + ID": f"{name} ({next_id})",
+                        "Name": name,
+                        "ID": next_id,
+                        "Roster Position": pos if pos in ("QB", "DST") else f"{pos}/FLEX",
+                        "Salary": int(salary),
+                        "Game Info": game_info,
+                        "TeamAbbrev": team,
+                        "AvgPointsPerGame": round(fpts, 2),
+                    })
+                    next_id += 1
+
+    return projections, player_ids
+
+
+def write_slate(out_dir, num_games, roster=None, seed=0):
+    """
+    Write a synthetic slate to out_dir/projections.csv and out_dir/player_ids.csv.
+    :return: (projection path, player id path).
+    """
+    projections, player_ids = generate_slate(num_games, roster, seed)
+    os.makedirs(out_dir, exist_ok=True)
+    projection_path = os.path.join(out_dir, "projections.csv")
+    player_id_path = os.path.join(out_dir, "player_ids.csv")
+
+    for path, columns, rows in (
+        (projection_path, PROJECTION_COLUMNS, projections),
+        (player_id_path, PLAYER_ID_COLUMNS, player_ids),
+    ):
+        with open(path, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=columns)
+            writer.writeheader()
+            writer.writerows(rows)
+    return projection_path, player_id_path
+
+
+def scale_roster(players_per_team):
+    """
+    Scale DEFAULT_ROSTER to about players_per_team players, keeping at least one per position.
+    """
+    scale = players_per_team / sum(DEFAULT_ROSTER.values())
+    return {pos: max(1, round(count * scale)) for pos, count in DEFAULT_ROSTER.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic DK NFL slate.")
+    parser.add_argument("--games", type=int, default=14)
+    parser.add_argument("--players-per-team", type=int, default=None,
+                        help="Scale the default roster to roughly this many players per team.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="synthetic_slate")
+    args = parser.parse_args()
+
+    roster = scale_roster(args.players_per_team) if args.players_per_team else None
+    projection_path, player_id_path = write_slate(args.out, args.games, roster, args.seed)
+    print(f"Wrote {projection_path} and {player_id_path}")
+
+
+if __name__ == "__main__":
+    main()
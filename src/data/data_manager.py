@@ -1,17 +1,23 @@
 import os
 import csv
 import re
-from data.player import Player
+from data.player_pool import PlayerPool
 from datetime import datetime
 import pytz
-import itertools
 import json
-import os
+
+from instrumentation import instrumentation
+
+# Roster slots of a DK NFL entry, in column order
+ENTRY_SLOTS = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "FLEX", "DST"]
+# "Name (12345678)" with DK's optional " (LOCKED)" marker
+ENTRY_SLOT_PATTERN = re.compile(r"\((\d+)\)( \(LOCKED\))?")
 
 class DataManager:
     def __init__(self, site):
         self.site = site
         self.config = self.load_config()
+        self.pool = None
         self.players = []
         self.lineups = []
         self.ids_to_gametime = {}
@@ -32,6 +38,15 @@ class DataManager:
         """
         return os.path.join(self.get_project_root(), relative_path)
     
+    def input_paths(self):
+        """
+        Absolute paths of the input files a run depends on (projections and player ids).
+        """
+        return [
+            self._resolve_path(self.config["projection_path"]),
+            self._resolve_path(self.config["player_path"]),
+        ]
+
     def populate_ids_to_gametime(self):
         """
         Populate the ids_to_gametime dictionary with timezone-aware datetimes.
@@ -48,10 +63,17 @@ class DataManager:
         """
         Load all player data from projections, ownership, and boom-bust files.
         """
-        self._load_projections(self._resolve_path(self.config["projection_path"]))
-        self._load_player_ids(self._resolve_path(self.config["player_path"]))
+        with instrumentation.timer("load_projections"):
+            self._load_projections(self._resolve_path(self.config["projection_path"]))
+        with instrumentation.timer("load_player_ids"):
+            self._load_player_ids(self._resolve_path(self.config["player_path"]))
+        instrumentation.count("players_loaded", len(self.players))
 
     def _load_projections(self, path):
+        columns = {
+            "names": [], "teams": [], "opponents": [], "positions": [], "salary": [], "stddev": [],
+            "floor": [], "ceiling": [], "boom": [], "bust": [], "optimal": [], "ownership": [], "fpts": [],
+        }
         with open(path, encoding="utf-8-sig") as file:
             reader = csv.DictReader(file)
             for row in reader:
@@ -64,40 +86,71 @@ class DataManager:
 
                     opp = row["Opp"].split()[-1]  # Take the last part of "vs PIT" or "@ DET"
 
-                    player = Player(
-                        name=row["Name"].strip(),
-                        team=row["Team"],
-                        opp=opp,
-                        position=positions,
-                        salary=int(row["Salary"].replace(",", "")),
-                        stddev=float(row["STDV"]),
-                        floor=float(row["Floor"]),
-                        ceiling=float(row["Ceiling"]),
-                        boom=float(row["Boom"]),
-                        bust=float(row["Bust"]),
-                        optimal=float(row["Optimal"]),
-                        own=float(row["Hero Own"]),
-                        fpts=fpts,
-                    )
-                    self.players.append(player)
+                    columns["names"].append(row["Name"].strip())
+                    columns["teams"].append(row["Team"])
+                    columns["opponents"].append(opp)
+                    columns["positions"].append(positions)
+                    columns["salary"].append(int(row["Salary"].replace(",", "")))
+                    columns["stddev"].append(float(row["STDV"]))
+                    columns["floor"].append(float(row["Floor"]))
+                    columns["ceiling"].append(float(row["Ceiling"]))
+                    columns["boom"].append(float(row["Boom"]))
+                    columns["bust"].append(float(row["Bust"]))
+                    columns["optimal"].append(float(row["Optimal"]))
+                    columns["ownership"].append(float(row["Hero Own"]))
+                    columns["fpts"].append(fpts)
+
+        # Players are views onto the columnar pool
+        self.pool = PlayerPool(columns)
+        self.players = list(self.pool.players)
+
+    @staticmethod
+    def _normalize_name(name):
+        return " ".join(name.split()).lower()
+
+    def _parse_game_info(self, game_info):
+        """
+        Parse the kickoff time out of a DK "Game Info" string, e.g. "DAL@PHI 12/29/2024 01:00PM ET".
+        :raises ValueError: If the date and time cannot be parsed.
+        """
+        # Split Game Info to extract date and time, handle "ET"
+        date_part, time_part, _ = game_info.split()[-3:]
+        return datetime.strptime(f"{date_part} {time_part}", "%m/%d/%Y %I:%M%p")
 
     def _load_player_ids(self, path):
+        """
+        Join DK player IDs and game times onto the loaded players by (name, team).
+        Game Info strings are parsed once each and the resulting datetime is shared.
+        """
+        players_by_key = {}
+        for player in self.players:
+            players_by_key.setdefault((self._normalize_name(player.name), player.team), player)
+
+        gametimes = {}
+        matched = set()
+        unmatched_rows = 0
         with open(path, encoding="utf-8-sig") as file:
             reader = csv.DictReader(file)
             for row in reader:
-                for player in self.players:
-                    if player.name == row["Name"].strip() and player.team == row["TeamAbbrev"]:
-                        player.id = row["ID"]
-                        game_info = row["Game Info"]
-                        try:
-                            # Split Game Info to extract date and time, handle "ET"
-                            date_part, time_part, _ = game_info.split()[-3:]
-                            player.gametime = datetime.strptime(
-                                f"{date_part} {time_part}", "%m/%d/%Y %I:%M%p"
-                            )
-                        except ValueError as e:
-                            raise ValueError(f"Error parsing Game Info '{game_info}' for player {player.name}: {e}")
-                        break
+                player = players_by_key.get((self._normalize_name(row["Name"]), row["TeamAbbrev"]))
+                if player is None:
+                    unmatched_rows += 1
+                    continue
+
+                player.id = row["ID"]
+                game_info = row["Game Info"]
+                if game_info not in gametimes:
+                    try:
+                        gametimes[game_info] = self._parse_game_info(game_info)
+                    except ValueError as e:
+                        raise ValueError(f"Error parsing Game Info '{game_info}' for player {player.name}: {e}")
+                player.gametime = gametimes[game_info]
+                matched.add(player)
+
+        unmatched_players = [player for player in self.players if player not in matched]
+        print(f"Matched {len(matched)} players to IDs; {unmatched_rows} ID rows had no projected player.")
+        for player in unmatched_players:
+            print(f"No ID found for {player.name} ({player.team})")
 
 
     def load_config(self):
@@ -106,108 +159,76 @@ class DataManager:
         :param site: The site for which to load the configuration ('dk' or 'fd').
         :return: The loaded configuration as a dictionary.
         """
-        config_path = "C:/Users/samba/nfl_dfs/data/dk/config/config.json"
+        config_path = self._resolve_path(os.path.join("data", self.site, "config", "config.json"))
         if not os.path.exists(config_path):
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
         with open(config_path, encoding="utf-8-sig") as file:
             return json.load(file)
 
 
-    def _load_player_ids(self, path):
-        with open(path, encoding="utf-8-sig") as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                for player in self.players:
-                    if player.name == row["Name"].strip() and player.team == row["TeamAbbrev"]:
-                        player.id = row["ID"]
-                        game_info = row["Game Info"]
-                        try:
-                            # Split Game Info to extract date and time, handle "ET"
-                            date_part, time_part, _ = game_info.split()[-3:]
-                            player.gametime = datetime.strptime(
-                                f"{date_part} {time_part}", "%m/%d/%Y %I:%M%p"
-                            )
-                        except ValueError as e:
-                            raise ValueError(f"Error parsing Game Info '{game_info}' for player {player.name}: {e}")
-                        break
-
-
-    def load_player_lineups(self, path):
-        # Read projections into a dictionary
-        with open(path, encoding="utf-8-sig") as file:
-            reader = csv.DictReader(self.lower_first(file))
-            current_time = self.eastern.localize(
-                datetime(2024, 12, 13, 19, 30)  # Year, Month, Day, Hour, Minute
-            )   
-            # current_time = datetime.datetime(2023, 10, 24, 20, 0) # testing time, such that LAL/DEN is locked
-            print(f"Current time (ET): {current_time}")
-            print(f"current player ids and gametimes dict: {self.ids_to_gametime}")
+
+    def locked_player_ids(self, current_time):
+        """
+        IDs of the players whose games have started.
+        :param current_time: Timezone-aware current time (US/Eastern).
+        """
+        if not self.ids_to_gametime:
+            self.populate_ids_to_gametime()
+        return {player_id for player_id, gametime in self.ids_to_gametime.items() if current_time >= gametime}
+
+    def iter_player_lineups(self, path, current_time):
+        """
+        Stream the entries of a DK NFL entries CSV. Each roster row is parsed with a single
+        regex pass over its slot cells, which picks up the player ID and DK's "(LOCKED)" marker.
+        A player is locked if DK marks them or their game started before current_time.
+        :param path: Path of the DK entries CSV.
+        :param current_time: Timezone-aware current time (US/Eastern).
+        :return: Generator of entry dictionaries with the slot-ordered "player_ids" and "locked" flags.
+        """
+        if self.site != "dk":
+            raise ValueError("Late swap is only supported for DraftKings entries.")
+        locked_ids = self.locked_player_ids(current_time)
+        skipped = 0
+        with open(path, encoding="utf-8-sig", newline="") as file:
+            reader = csv.reader(file)
+            header = [column.strip().lower() for column in next(reader)]
+            first_slot = header.index("qb")
+            slot_columns = slice(first_slot, first_slot + len(ENTRY_SLOTS))
+            if header[slot_columns] != [slot.lower() for slot in ENTRY_SLOTS]:
+                raise ValueError(f"Unexpected roster columns in {path}: {header[slot_columns]}")
+            entry_id, contest_name, contest_id, entry_fee = (
+                header.index(column) for column in ("entry id", "contest name", "contest id", "entry fee")
+            )
+
             for row in reader:
-                if row["entry id"] != "" and self.site == "dk":
-                    PG_id = re.search(r"\((\d+)\)", row["pg"]).group(1)
-                    SG_id = re.search(r"\((\d+)\)", row["sg"]).group(1)
-                    SF_id = re.search(r"\((\d+)\)", row["sf"]).group(1)
-                    PF_id = re.search(r"\((\d+)\)", row["pf"]).group(1)
-                    C_id = re.search(r"\((\d+)\)", row["c"]).group(1)
-                    G_id = re.search(r"\((\d+)\)", row["g"]).group(1)
-                    F_id = re.search(r"\((\d+)\)", row["f"]).group(1)
-                    UTIL_id = re.search(r"\((\d+)\)", row["util"]).group(1)
-                    self.lineups.append(
-                        {
-                            "entry_id": row["entry id"],
-                            "contest_id": row["contest id"],
-                            "contest_name": row["contest name"],
-                            "PG": row["pg"].replace("-", "#"),
-                            "SG": row["sg"].replace("-", "#"),
-                            "SF": row["sf"].replace("-", "#"),
-                            "PF": row["pf"].replace("-", "#"),
-                            "C": row["c"].replace("-", "#"),
-                            "G": row["g"].replace("-", "#"),
-                            "F": row["f"].replace("-", "#"),
-                            "UTIL": row["util"].replace("-", "#"),
-                            "PG_is_locked": (
-                                current_time > self.ids_to_gametime[PG_id]
-                                if PG_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "SG_is_locked": (
-                                current_time > self.ids_to_gametime[SG_id]
-                                if SG_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "SF_is_locked": (
-                                current_time > self.ids_to_gametime[SF_id]
-                                if SF_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "PF_is_locked": (
-                                current_time > self.ids_to_gametime[PF_id]
-                                if PF_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "C_is_locked": (
-                                current_time > self.ids_to_gametime[C_id]
-                                if C_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "G_is_locked": (
-                                current_time > self.ids_to_gametime[G_id]
-                                if G_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "F_is_locked": (
-                                current_time > self.ids_to_gametime[F_id]
-                                if F_id in self.ids_to_gametime
-                                else False
-                            ),
-                            "UTIL_is_locked": current_time
-                            > self.ids_to_gametime[UTIL_id],
-                        }
-                    )
+                if len(row) < slot_columns.stop or not row[entry_id].strip():
+                    continue  # Blank line or the player list DK appends below the entries
+                slots = ENTRY_SLOT_PATTERN.findall("|".join(row[slot_columns]))
+                if len(slots) != len(ENTRY_SLOTS):
+                    skipped += 1
+                    continue
+                yield {
+                    "entry_id": row[entry_id].strip(),
+                    "contest_name": row[contest_name],
+                    "contest_id": row[contest_id],
+                    "entry_fee": row[entry_fee],
+                    "player_ids": [player_id for player_id, _ in slots],
+                    "locked": [bool(marker) or player_id in locked_ids for player_id, marker in slots],
+                }
+        if skipped:
+            print(f"Skipped {skipped} entries without a complete roster.")
+
+    def load_player_lineups(self, path, current_time=None):
+        """
+        Load the entries of a DK NFL entries CSV into self.lineups for late swap.
+        :param path: Path of the DK entries CSV.
+        :param current_time: Timezone-aware time to lock players against; defaults to now (US/Eastern).
+        """
+        if current_time is None:
+            current_time = datetime.now(self.eastern)
+        print(f"Current time (ET): {current_time}")
+        self.lineups = list(self.iter_player_lineups(path, current_time))
         print(f"Successfully loaded {len(self.lineups)} lineups for late swap.")
 
-    def lower_first(self, iterator):
-        return itertools.chain([next(iterator).lower()], iterator)
-
 
 
@@ -1,27 +1,42 @@
-class Player:
-    def __init__(self, name, team, opp, position, salary, stddev, floor, ceiling, boom, bust, optimal, own, fpts):
-        self.name = name
-        self.team = team
-        self.opponent = opp
-        self.position = position
-        self.salary = salary
-        self.stddev = stddev
-        self.floor = floor
-        self.ceiling = ceiling
-        self.boom = boom
-        self.bust = bust
-        self.optimal = optimal
-        self.ownership = own
-        self.std_ownership = own / 10
-        self.fpts = fpts
-        self.id = None
-        self.gametime = None
+def _column(name):
+    """Read-only attribute backed by a PlayerPool column."""
+    return property(lambda self: getattr(self.pool, name)[self.row])
 
-    def __str__(self):
-        return f"Player(name={self.name},team={self.team},opp={self.opponent}, position={self.position} fpts={self.fpts}, own={self.ownership}, id={self.id})"
 
+def _writable_column(name):
+    """Attribute backed by a PlayerPool column that can also be assigned (e.g. id, gametime)."""
+    def setter(self, value):
+        getattr(self.pool, name)[self.row] = value
+    return property(lambda self: getattr(self.pool, name)[self.row], setter)
 
 
+class Player:
+    """
+    Lightweight view onto one row of a PlayerPool. Attribute reads go straight to the
+    pool's columns, so a Player carries no per-instance dictionary.
+    """
+    __slots__ = ("pool", "row")
 
+    def __init__(self, pool, row):
+        self.pool = pool
+        self.row = row
 
+    name = _column("names")
+    team = _column("teams")
+    opponent = _column("opponents")
+    position = _column("positions")
+    salary = _column("salary")
+    stddev = _column("stddev")
+    floor = _column("floor")
+    ceiling = _column("ceiling")
+    boom = _column("boom")
+    bust = _column("bust")
+    optimal = _column("optimal")
+    ownership = _column("ownership")
+    std_ownership = _column("std_ownership")
+    fpts = _column("fpts")
+    id = _writable_column("ids")
+    gametime = _writable_column("gametimes")
 
+    def __str__(self):
+        return f"Player(name={self.name},team={self.team},opp={self.opponent}, position={self.position} fpts={self.fpts}, own={self.ownership}, id={self.id})"
@@ -0,0 +1,105 @@
+import numpy as np
+
+from data.player import Player
+
+POSITIONS = ["QB", "RB", "WR", "TE", "DST", "FLEX"]
+NUMERIC_COLUMNS = ["salary", "stddev", "floor", "ceiling", "boom", "bust", "optimal", "ownership", "fpts"]
+
+
+class PlayerPool:
+    """
+    Columnar store of a player pool. Numeric attributes are NumPy arrays, text attributes
+    are lists, and team, game and position membership are precomputed as index arrays and
+    masks. The Player objects in self.players are views onto rows of the pool they were
+    loaded into.
+    """
+
+    def __init__(self, columns, players=None):
+        """
+        :param columns: Dictionary of column name -> sequence, one entry per player.
+        :param players: Existing Player views aligned to the columns. If omitted, views onto
+            this pool are created.
+        """
+        self.names = list(columns["names"])
+        self.teams = list(columns["teams"])
+        self.opponents = list(columns["opponents"])
+        self.positions = list(columns["positions"])
+        self.ids = list(columns.get("ids") or [None] * len(self.names))
+        self.gametimes = list(columns.get("gametimes") or [None] * len(self.names))
+
+        self.salary = np.asarray(columns["salary"], dtype=np.int64)
+        for name in NUMERIC_COLUMNS[1:]:
+            setattr(self, name, np.asarray(columns[name], dtype=np.float64))
+        self.std_ownership = self.ownership / 10
+
+        # Team, game and position indexes
+        self.team_names = sorted(set(self.teams) | {opp for opp in self.opponents if opp})
+        team_lookup = {team: i for i, team in enumerate(self.team_names)}
+        self.team_index = np.array([team_lookup[team] for team in self.teams], dtype=np.int32)
+        self.opponent_index = np.array(
+            [team_lookup[opp] if opp else -1 for opp in self.opponents], dtype=np.int32
+        )
+
+        game_keys = [tuple(sorted([team, opp])) if opp else None for team, opp in zip(self.teams, self.opponents)]
+        self.game_keys = list(dict.fromkeys(key for key in game_keys if key is not None))
+        game_lookup = {key: i for i, key in enumerate(self.game_keys)}
+        self.game_index = np.array(
+            [game_lookup[key] if key is not None else -1 for key in game_keys], dtype=np.int32
+        )
+
+        self.position_index = np.array([POSITIONS.index(pos[0]) for pos in self.positions], dtype=np.int32)
+        self.position_masks = {
+            pos: np.array([pos in player_positions for player_positions in self.positions], dtype=bool)
+            for pos in POSITIONS
+        }
+
+        if players is None:
+            players = [Player(self, row) for row in range(len(self.names))]
+        self.players = list(players)
+        self.index = {player: i for i, player in enumerate(self.players)}
+
+    def __len__(self):
+        return len(self.players)
+
+    def subset(self, players):
+        """
+        Columnar snapshot of some of this pool's players, aligned to the given order.
+        The returned pool shares the Player views, which keep pointing at this pool.
+        """
+        rows = np.array([player.row for player in players], dtype=np.int64)
+        columns = {
+            "names": [self.names[row] for row in rows],
+            "teams": [self.teams[row] for row in rows],
+            "opponents": [self.opponents[row] for row in rows],
+            "positions": [self.positions[row] for row in rows],
+            "ids": [self.ids[row] for row in rows],
+            "gametimes": [self.gametimes[row] for row in rows],
+        }
+        for name in NUMERIC_COLUMNS:
+            columns[name] = getattr(self, name)[rows]
+        return PlayerPool(columns, players=players)
+
+    @classmethod
+    def from_players(cls, players):
+        """
+        Build a columnar pool aligned to an arbitrary list of players. Lists drawn from a
+        single pool are gathered with array indexing; anything else is read attribute by attribute.
+        """
+        players = list(players)
+        if players and all(player.pool is players[0].pool for player in players):
+            pool = players[0].pool
+            if players == pool.players:
+                return pool
+            return pool.subset(players)
+
+        columns = {
+            "names": [player.name for player in players],
+            "teams": [player.team for player in players],
+            "opponents": [player.opponent for player in players],
+            "positions": [player.position for player in players],
+            "ids": [player.id for player in players],
+            "gametimes": [player.gametime for player in players],
+        }
+        for name in NUMERIC_COLUMNS:
+            columns[name] = [getattr(player, name) for player in players]
+        return cls(columns, players=players)
@@ -1,22 +1,8 @@
-import pandas as pd
 import numpy as np
-from collections import defaultdict
+import pandas as pd
 
 from data.data_manager import DataManager
-
-# Define the correlation matrix
-position_corr = np.array([
-    [0.000, 0.056, 0.455, 0.411, -0.044, 0.271, 0.044, 0.147, 0.226, -0.424],  # QB
-    [0.056, 0.000, 0.007, 0.036, 0.050, 0.044, -0.099, 0.070, 0.142, -0.201],  # RB
-    [0.455, 0.007, 0.000, 0.030, -0.034, 0.147, 0.087, 0.127, -0.147, -0.234],  # WR
-    [0.411, 0.036, 0.030, 0.000, -0.124, 0.226, 0.069, 0.128, 0.129, -0.126],  # TE
-    [-0.044, 0.050, -0.034, -0.124, 0.000, -0.424, -0.201, -0.235, -0.126, -0.340],  # DST
-    [0.271, 0.044, 0.147, 0.226, -0.424, 0.000, 0.056, 0.456, 0.411, -0.044],  # OPPQB
-    [0.044, -0.099, 0.087, 0.069, -0.201, 0.056, 0.000, 0.008, 0.036, 0.050],  # OPPRB
-    [0.147, 0.070, 0.127, 0.128, -0.235, 0.456, 0.008, 0.000, 0.030, -0.033],  # OPPWR
-    [0.226, 0.142, -0.147, 0.129, -0.126, 0.411, 0.036, 0.030, 0.000, -0.124],  # OPPTE
-    [-0.424, -0.201, -0.234, -0.126, -0.340, -0.044, 0.050, -0.033, -0.124, 0.000],  # OPPDST
-])
+from optimizer.correlation import GameCorrelationCache
 
 ### Entry point of the application
 def main():
@@ -46,69 +32,21 @@ def main():
     # Add a tunable parameter for correlation adjustment
     correlation_adjustment = data_manager.config.get("correlation_adjustment", 0.25)
 
-    # Group players by game
-    players_by_game = defaultdict(lambda: {"team_a": [], "team_b": []})
-    for player in data_manager.players:
-        if player.opponent:
-            game_key = tuple(sorted([player.team, player.opponent]))
-            if player.team == game_key[0]:
-                players_by_game[game_key]["team_a"].append(player)
-            else:
-                players_by_game[game_key]["team_b"].append(player)
+    # Correlation matrices and Cholesky factors are built once per game
+    correlation_cache = GameCorrelationCache(data_manager.players, data_manager.config["randomness_amount"])
+
+    # One generator for every game, so a set "random_seed" reproduces the file
+    rng = np.random.default_rng(data_manager.config.get("random_seed"))
 
     # Initialize list to store DataFrames for each game
     game_projections_dfs = []
 
-    for game, teams in players_by_game.items():
-        team_a_players = teams["team_a"]
-        team_b_players = teams["team_b"]
-        all_game_players = team_a_players + team_b_players
-
+    for game, game_data in correlation_cache.games.items():
+        all_game_players = game_data["players"]
         num_game_players = len(all_game_players)
-        game_corr = np.zeros((num_game_players, num_game_players))
-
-        # Map positions to indices in the correlation matrix
-        position_to_index = {
-            "QB": 0, "RB": 1, "WR": 2, "TE": 3, "DST": 4,
-            "OPPQB": 5, "OPPRB": 6, "OPPWR": 7, "OPPTE": 8, "OPPDST": 9,
-        }
-
-        # Build the correlation matrix for the current game
-        for i, player_i in enumerate(all_game_players):
-            for j, player_j in enumerate(all_game_players):
-                pos_i = player_i.position[0]  # Assume single position
-                pos_j = player_j.position[0]
-                team_i = player_i.team
-                team_j = player_j.team
-
-                if team_i == team_j:
-                    # Same team correlation
-                    game_corr[i, j] = position_corr[
-                        position_to_index[pos_i], position_to_index[pos_j]
-                    ]
-                else:
-                    # Cross-team correlation
-                    game_corr[i, j] = position_corr[
-                        position_to_index[f"OPP{pos_i}"], position_to_index[f"OPP{pos_j}"]
-                    ]
-
-        # Ensure positive semi-definiteness
-        epsilon = 1e-10
-        game_corr = (game_corr + game_corr.T) / 2
-        np.fill_diagonal(game_corr, 1.0)
-        eigvals = np.linalg.eigvalsh(game_corr)
-        if np.min(eigvals) < 0:
-            game_corr += (-np.min(eigvals) + epsilon) * np.eye(num_game_players)
-
-        # Generate correlated random values
-        mean_fpts = [player.fpts for player in all_game_players]
-        stddevs = [player.stddev * data_manager.config["randomness_amount"] / 100 for player in all_game_players]
-        uncorrelated = np.random.normal(loc=mean_fpts, scale=stddevs, size=num_game_players)
-        L = np.linalg.cholesky(game_corr)
-        correlated = np.dot(L, uncorrelated)
-
-        # Apply the correlation adjustment
-        adjusted_projections = (1 - correlation_adjustment) * uncorrelated + correlation_adjustment * correlated
+        mean_fpts = game_data["mean"]
+        stddevs = game_data["stddev"]
+        uncorrelated, correlated, adjusted_projections = correlation_cache.sample_game(game, correlation_adjustment, rng)
 
         # Create a DataFrame for this game's projections
         game_df = pd.DataFrame({
@@ -0,0 +1,164 @@
+import cProfile
+import json
+import os
+import pstats
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+_NULL_TIMER = nullcontext()
+
+
+class _Timer:
+    __slots__ = ("instrumentation", "name", "start")
+
+    def __init__(self, instrumentation, name):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.instrumentation.record(self.name, self.start, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation:
+    """
+    Named timers and counters for the optimizer pipeline. Every timed block becomes an
+    event tagged with the current lineup iteration, which feeds both the per-run summary
+    and the per-iteration trace. When disabled, timer() hands back a shared no-op context
+    manager and count() returns immediately.
+    """
+
+    def __init__(self):
+        self.configure({})
+
+    def configure(self, settings):
+        """
+        :param settings: The "instrumentation" section of config.json:
+            enabled, trace_path, trace_format ("json" or "chrome"), profile_path.
+        """
+        self.enabled = settings.get("enabled", False)
+        self.trace_path = settings.get("trace_path")
+        self.trace_format = settings.get("trace_format", "chrome")
+        self.profile_path = settings.get("profile_path")
+        self.iteration = None
+        self.events = []  # (name, start, duration, iteration)
+        self.counters = defaultdict(int)
+        self.origin = time.perf_counter()
+
+    def timer(self, name):
+        if not self.enabled:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def record(self, name, start, duration):
+        self.events.append((name, start, duration, self.iteration))
+
+    def count(self, name, value=1):
+        if self.enabled:
+            self.counters[name] += value
+
+    @contextmanager
+    def profile(self):
+        """
+        Run the block under cProfile when a profile_path is configured and dump the stats there.
+        """
+        if not (self.enabled and self.profile_path):
+            yield
+            return
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(self.profile_path)
+            print(f"Profile written to {self.profile_path}")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+
+    def summary(self):
+        """
+        :return: Dictionary of timer name -> {count, total, mean, max} in seconds, plus counters.
+        """
+        timers = defaultdict(list)
+        for name, _, duration, _ in self.events:
+            timers[name].append(duration)
+        return {
+            "timers": {
+                name: {
+                    "count": len(durations),
+                    "total": sum(durations),
+                    "mean": sum(durations) / len(durations),
+                    "max": max(durations),
+                }
+                for name, durations in timers.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def print_summary(self):
+        summary = self.summary()
+        print(f"\n{'stage':<28}{'count':>8}{'total s':>12}{'mean ms':>12}{'max ms':>12}")
+        for name, stats in sorted(summary["timers"].items(), key=lambda item: -item[1]["total"]):
+            print(
+                f"{name:<28}{stats['count']:>8}{stats['total']:>12.3f}"
+                f"{stats['mean'] * 1000:>12.2f}{stats['max'] * 1000:>12.2f}"
+            )
+        for name, value in sorted(summary["counters"].items()):
+            print(f"{name:<28}{value:>8}")
+
+    def write_trace(self, path=None):
+        """
+        Write the event trace as plain JSON (summary + per-iteration events) or in Chrome
+        trace format (load in chrome://tracing or Perfetto).
+        """
+        path = path or self.trace_path
+        if not path:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        if self.trace_format == "chrome":
+            trace = {
+                "traceEvents": [
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "ts": (start - self.origin) * 1e6,
+                        "dur": duration * 1e6,
+                        "pid": os.getpid(),
+                        "tid": 0,
+                        "args": {"iteration": iteration},
+                    }
+                    for name, start, duration, iteration in self.events
+                ]
+            }
+        else:
+            iterations = defaultdict(dict)
+            for name, _, duration, iteration in self.events:
+                if iteration is not None:
+                    iterations[iteration][name] = iterations[iteration].get(name, 0.0) + duration
+            trace = {
+                "summary": self.summary(),
+                "iterations": [
+                    {"iteration": iteration, **timings} for iteration, timings in sorted(iterations.items())
+                ],
+            }
+        with open(path, "w") as file:
+            json.dump(trace, file)
+        print(f"Trace written to {path}")
+
+    def finish(self):
+        """
+        Emit the per-run summary and the trace, if enabled.
+        """
+        if not self.enabled:
+            return
+        self.print_summary()
+        self.write_trace()
+
+
+# Process-wide instance shared by the pipeline modules
+instrumentation = Instrumentation()
@@ -0,0 +1,202 @@
+import csv
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from data.player_pool import PlayerPool, POSITIONS
+from optimizer.sampler import ProjectionSampler
+
+# Roster of a DK NFL lineup by primary position; FLEX is drawn from RB/WR/TE afterwards
+FIELD_ROSTER = {"QB": 1, "RB": 2, "WR": 3, "TE": 1, "DST": 1}
+FLEX_POSITIONS = ("RB", "WR", "TE")
+FIELD_ROSTER_SIZE = sum(FIELD_ROSTER.values())
+
+
+def load_payouts(path, field_size, entry_fee, rake=0.15, paid_fraction=0.22):
+    """
+    Payout per finishing place. Reads a contest structure CSV with "Place" (e.g. "1" or
+    "11-15") and "Payout" columns when path exists; otherwise builds a typical GPP curve
+    paying the top paid_fraction of the field from the raked prize pool.
+    :return: Array of length field_size + 1 with the payout of place i + 1 at index i.
+    """
+    payouts = np.zeros(field_size + 1, dtype=np.float64)
+    if path and os.path.exists(path):
+        with open(path, encoding="utf-8-sig") as file:
+            for row in csv.DictReader(file):
+                first, _, last = row["Place"].partition("-")
+                start, end = int(first), int(last or first)
+                payouts[start - 1:min(end, len(payouts))] = float(row["Payout"].replace("$", "").replace(",", ""))
+        return payouts
+
+    prize_pool = field_size * entry_fee * (1 - rake)
+    paid = max(1, int(field_size * paid_fraction))
+    min_cash = min(1.5 * entry_fee, prize_pool / paid)
+    weights = 1 / np.arange(1, paid + 1) ** 1.1
+    payouts[:paid] = min_cash + (prize_pool - min_cash * paid) * weights / weights.sum()
+    return payouts
+
+
+def build_field(pool, field_size, max_salary=50000, min_salary=45000, stack_rate=0.75, seed=None, batch_size=20000):
+    """
+    Draw a synthetic contest field where each slot is picked with probability proportional
+    to ownership. Every batch draws all lineups at once with the Gumbel top-k trick (the k
+    largest of log(ownership) + Gumbel noise are a weighted sample without replacement).
+    Lineups outside the salary range, or with offense facing their own DST, are rejected and
+    redrawn. Unstacked lineups (no WR/TE from the QB's team) are thinned so that about
+    stack_rate of the field stacks its QB, as real GPP fields do.
+    :param pool: PlayerPool of the slate.
+    :return: (field_size x 9) array of player indices into the pool.
+    """
+    rng = np.random.default_rng(seed)
+    log_ownership = np.log(np.clip(pool.ownership, 0, None) + 1e-12)
+    eligible = pool.ownership > 0
+    position_masks = {pos: eligible & (pool.position_index == POSITIONS.index(pos)) for pos in FIELD_ROSTER}
+    flex_mask = np.any([position_masks[pos] for pos in FLEX_POSITIONS], axis=0)
+    stack_mask = np.isin(pool.position_index, [POSITIONS.index("WR"), POSITIONS.index("TE")])
+
+    field = []
+    drawn = 0
+    while drawn < field_size:
+        keys = log_ownership + rng.gumbel(size=(batch_size, len(pool)))
+        picks = []
+        for pos, count in FIELD_ROSTER.items():
+            masked = np.where(position_masks[pos], keys, -np.inf)
+            picks.append(np.argpartition(-masked, count - 1, axis=1)[:, :count])
+        lineups = np.concatenate(picks, axis=1)
+
+        # FLEX: best remaining RB/WR/TE key
+        flex_keys = np.where(flex_mask, keys, -np.inf)
+        np.put_along_axis(flex_keys, lineups, -np.inf, axis=1)
+        lineups = np.concatenate([lineups, flex_keys.argmax(axis=1)[:, None]], axis=1)
+
+        salary = pool.salary[lineups].sum(axis=1)
+        teams = pool.team_index[lineups]
+        qb_team = teams[:, [0]]  # QB is the first pick
+        dst_opponent = pool.opponent_index[lineups[:, [FIELD_ROSTER_SIZE - 1]]]  # DST is the last primary pick
+        offense = np.arange(lineups.shape[1]) != FIELD_ROSTER_SIZE - 1
+        against_dst = ((teams == dst_opponent) & offense).any(axis=1)
+        stacked = ((teams == qb_team) & stack_mask[lineups]).any(axis=1)
+
+        valid = (salary <= max_salary) & (salary >= min_salary) & ~against_dst
+        # Keep unstacked lineups with the probability that brings the stacked share to stack_rate
+        num_stacked, num_unstacked = (valid & stacked).sum(), (valid & ~stacked).sum()
+        if stack_rate >= 1:
+            keep_unstacked = 0.0
+        elif num_unstacked and stack_rate > 0:
+            keep_unstacked = min(1.0, num_stacked * (1 - stack_rate) / (stack_rate * num_unstacked))
+        else:
+            keep_unstacked = 1.0
+        valid &= stacked | (rng.random(len(lineups)) < keep_unstacked)
+        if not valid.any():
+            raise ValueError(f"No field lineups drawn with salary between {min_salary} and {max_salary}.")
+        field.append(lineups[valid][:field_size - drawn])
+        drawn += len(field[-1])
+    return np.concatenate(field)
+
+
+def _simulate_chunk(players, config, lineup_rows, field_rows, payouts, num_sims, seed):
+    """
+    Worker entry point: score the lineups and the field on num_sims correlated outcomes.
+    :return: Dictionary of per-lineup sums over the chunk's sims.
+    """
+    sampler = ProjectionSampler(
+        players, config["randomness_amount"], config.get("correlation_adjustment", 0.0), seed=seed
+    )
+    outcomes = sampler.sample_outcomes(num_sims).astype(np.float32).T  # players x sims
+
+    def selection(rows):
+        matrix = np.zeros((len(rows), len(players)), dtype=np.float32)
+        np.put_along_axis(matrix, rows.astype(np.int64), 1, axis=1)
+        return matrix
+
+    lineup_scores = selection(lineup_rows) @ outcomes  # lineups x sims
+    field_scores = np.sort(selection(field_rows) @ outcomes, axis=0)  # field x sims, ascending
+
+    # Place of each lineup against the field: 1 + field entries scoring strictly higher
+    places = np.empty(lineup_scores.shape, dtype=np.int64)
+    for sim in range(num_sims):
+        not_above = np.searchsorted(field_scores[:, sim], lineup_scores[:, sim], side="right")
+        places[:, sim] = len(field_rows) + 1 - not_above
+
+    top_one_percent = max(1, math.ceil(0.01 * (len(field_rows) + 1)))
+    winnings = payouts[np.minimum(places, len(payouts)) - 1]
+    return {
+        "wins": (places == 1).sum(axis=1),
+        "top_1": (places <= top_one_percent).sum(axis=1),
+        "cashes": (winnings > 0).sum(axis=1),
+        "winnings": winnings.sum(axis=1),
+        "score": lineup_scores.sum(axis=1, dtype=np.float64),
+    }
+
+
+def simulate_contest(lineups, players, config, payouts_path=None):
+    """
+    Simulate a GPP: draw correlated full-slate outcomes, build a synthetic field from
+    ownership and score every lineup against the field in every sim with one
+    (lineups x players) . (players x sims) product per chunk. Chunks of "chunk_size" sims
+    run on "num_workers" processes (all cores by default), so memory stays bounded.
+    Each lineup is entered once against the field; ties are counted in its favour.
+    Outcomes are centered on the same projections the lineups were optimized for, while
+    the field only follows ownership, so the rates and ROI are an upper bound on what the
+    lineups can earn, not an estimate.
+    :param lineups: Lineups instance.
+    :param players: Player objects of the whole slate. The field and the outcomes are drawn
+        from this pool, not from the players the lineups happen to use.
+    :param config: The loaded configuration dictionary; settings come from "contest_sim".
+    :param payouts_path: Optional contest structure CSV (see load_payouts).
+    :return: DataFrame with one row per lineup: win, top 1% and cash rates, average
+        score, average winnings and ROI.
+    """
+    settings = config.get("contest_sim", {})
+    num_sims = settings.get("num_sims", 2000)
+    chunk_size = max(1, settings.get("chunk_size", 250))
+    num_workers = settings.get("num_workers") or os.cpu_count()
+    field_size = settings.get("field_size", 10000)
+    entry_fee = settings.get("entry_fee", 20)
+    seed = config.get("random_seed")
+
+    pool = PlayerPool.from_players(players)
+    field_rows = build_field(
+        pool, field_size, min_salary=settings.get("field_min_salary", 45000),
+        stack_rate=settings.get("field_stack_rate", 0.75), seed=seed,
+    )
+    payouts = load_payouts(payouts_path, field_size, entry_fee)
+
+    chunks = [min(chunk_size, num_sims - start) for start in range(0, num_sims, chunk_size)]
+    seeds = [int(child.generate_state(1)[0]) for child in np.random.SeedSequence(seed).spawn(len(chunks))]
+    # Re-index the lineups from their own player list into the slate pool
+    slate_index = {player.id: i for i, player in enumerate(players)}
+    index_map = np.array([slate_index[player.id] for player in lineups.players], dtype=np.int64)
+    lineup_rows = index_map[lineups.rows]
+
+    print(f"Simulating {num_sims} contests of {field_size} entries in {len(chunks)} chunks on {num_workers} workers...")
+    start = time.perf_counter()
+    if num_workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(_simulate_chunk, players, config, lineup_rows, field_rows, payouts, size, chunk_seed)
+                for size, chunk_seed in zip(chunks, seeds)
+            ]
+            results = [future.result() for future in futures]
+    else:
+        results = [
+            _simulate_chunk(players, config, lineup_rows, field_rows, payouts, size, chunk_seed)
+            for size, chunk_seed in zip(chunks, seeds)
+        ]
+    print(f"Contest simulation finished in {time.perf_counter() - start:.2f} s")
+
+    totals = {key: sum(result[key] for result in results) for key in results[0]}
+    average_winnings = totals["winnings"] / num_sims
+    return pd.DataFrame({
+        "Lineup": np.arange(len(lineup_rows)),
+        "Win %": totals["wins"] / num_sims * 100,
+        "Top 1%": totals["top_1"] / num_sims * 100,
+        "Cash %": totals["cashes"] / num_sims * 100,
+        "Avg Score": totals["score"] / num_sims,
+        "Avg Winnings": average_winnings,
+        "ROI %": (average_winnings - entry_fee) / entry_fee * 100,
+    })
@@ -0,0 +1,161 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.data_manager import ENTRY_SLOTS
+from data.player_pool import POSITIONS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet export is optional
+    pq = None
+
+EXPORT_FORMATS = ("csv", "dk", "parquet")
+
+# Slot names per site for the CSV header. FanDuel NFL uses the DK layout with "DEF" in the last slot.
+SITE_SLOTS = {"dk": ENTRY_SLOTS, "fd": ENTRY_SLOTS[:-1] + ["DEF"]}
+# Unique column names for the slots; the CSV header repeats the site's slot names instead
+SLOT_COLUMNS = ["QB", "RB1", "RB2", "WR1", "WR2", "WR3", "TE", "FLEX", "DST"]
+STAT_COLUMNS = [
+    "Salary", "Fpts Proj", "Own. Prod.", "Own. Sum.", "Team Stack", "Runback", "Stack Positions",
+    "Runback Positions", "Max Non-QB Team Players", "Offensive vs Defensive", "Ownership Array",
+]
+
+
+class LineupExporter:
+    """
+    Writes lineup pools to disk. Every aggregate (salary, projection, ownership, stack and
+    runback counts, team limits) is computed over a lineups x slots matrix of player
+    indices, and rows are written in chunks so large pools never build one big string.
+    Formats:
+        csv      lineups with their aggregate stats
+        dk       DK upload file, player IDs only (DraftKings lineups only)
+        parquet  same columns as csv (requires pyarrow)
+    Stack, runback and offense counts come from each slot's position code, so FanDuel
+    lineups, which the model does not hold to the DK slot layout, get the same stats.
+    """
+
+    def __init__(self, site, chunk_size=5000):
+        if site not in SITE_SLOTS:
+            raise ValueError(f"Unknown site '{site}'. Available sites: {', '.join(SITE_SLOTS)}")
+        self.site = site
+        self.chunk_size = max(1, chunk_size)
+
+    def _player_arrays(self, players):
+        teams = sorted({player.team for player in players} | {player.opponent for player in players})
+        team_index = {team: i for i, team in enumerate(teams)}
+        return {
+            "labels": np.array([f"{player.name} ({player.id})" for player in players], dtype=object),
+            "ids": np.array([str(player.id) for player in players], dtype=object),
+            "salary": np.array([player.salary for player in players], dtype=np.int64),
+            "fpts": np.array([player.fpts for player in players], dtype=np.float64),
+            "ownership": np.array([player.ownership for player in players], dtype=np.float64),
+            "team": np.array([team_index[player.team] for player in players], dtype=np.int64),
+            "opponent": np.array([team_index[player.opponent] for player in players], dtype=np.int64),
+            "num_teams": len(teams),
+        }
+
+    def lineup_matrix(self, lineups):
+        """
+        :param lineups: Lineups instance.
+        :return: (players, lineups x slots matrix of indices into players,
+            matching matrix of slot position codes).
+        """
+        rows, positions = lineups.slot_ordered()
+        return lineups.players, rows, positions
+
+    def aggregates(self, arrays, rows, positions):
+        """
+        Lineup stats for a block of lineups.
+        :param arrays: Player arrays from _player_arrays.
+        :param rows: lineups x slots matrix of player indices.
+        :param positions: lineups x slots matrix of slot position codes.
+        :return: DataFrame with the slot and STAT_COLUMNS columns.
+        """
+        teams = arrays["team"][rows]
+        ownership = arrays["ownership"][rows]
+        offense = positions != POSITIONS.index("DST")
+        is_qb = positions == POSITIONS.index("QB")
+
+        qb_slot = is_qb.argmax(axis=1)[:, None]
+        qb_team = np.take_along_axis(teams, qb_slot, axis=1)
+        qb_opponent = arrays["opponent"][np.take_along_axis(rows, qb_slot, axis=1)]
+        stack = offense & ~is_qb & (teams == qb_team)
+        runback = offense & (teams == qb_opponent)
+
+        # Largest number of offensive players from a team outside the QB's game
+        other = offense & (teams != qb_team) & (teams != qb_opponent)
+        team_counts = np.zeros((len(rows), arrays["num_teams"]), dtype=np.int64)
+        np.add.at(team_counts, (np.repeat(np.arange(len(rows)), other.sum(axis=1)), teams[other]), 1)
+
+        slot_names = np.array(POSITIONS, dtype=object)[positions]
+        stack_count = stack.sum(axis=1)
+        runback_count = runback.sum(axis=1)
+        offensive_count = offense.sum(axis=1)
+
+        frame = pd.DataFrame(arrays["labels"][rows], columns=SLOT_COLUMNS)
+        frame["Salary"] = arrays["salary"][rows].sum(axis=1)
+        frame["Fpts Proj"] = arrays["fpts"][rows].sum(axis=1).round(2)
+        frame["Own. Prod."] = np.prod(ownership / 100, axis=1)
+        frame["Own. Sum."] = ownership.sum(axis=1)
+        frame["Team Stack"] = [f"QB +{s} | {r}" for s, r in zip(stack_count, runback_count)]
+        frame["Runback"] = runback_count
+        frame["Stack Positions"] = ["; ".join(names[mask]) for names, mask in zip(slot_names, stack)]
+        frame["Runback Positions"] = ["; ".join(names[mask]) for names, mask in zip(slot_names, runback)]
+        frame["Max Non-QB Team Players"] = team_counts.max(axis=1)
+        frame["Offensive vs Defensive"] = [f"{o}/{rows.shape[1] - o}" for o in offensive_count]
+        frame["Ownership Array"] = ["|".join(map(str, row)) for row in ownership.tolist()]
+        return frame
+
+    def export(self, lineups, path, fmt="csv"):
+        """
+        Write the lineups to path in the given format, creating the directory if needed.
+        :param lineups: Lineups instance.
+        :param path: Output file path.
+        :param fmt: One of EXPORT_FORMATS.
+        """
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unknown export format '{fmt}'. Available formats: {', '.join(EXPORT_FORMATS)}")
+        if fmt == "parquet" and pq is None:
+            raise ImportError("Parquet export requires the pyarrow package (pip install pyarrow).")
+        if fmt == "dk" and self.site != "dk":
+            raise ValueError("The dk upload format is only available for DraftKings lineups.")
+
+        players, rows, positions = self.lineup_matrix(lineups)
+        arrays = self._player_arrays(players)
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        chunks = (
+            (rows[start:start + self.chunk_size], positions[start:start + self.chunk_size])
+            for start in range(0, len(rows), self.chunk_size)
+        )
+
+        if fmt == "parquet":
+            writer = None
+            for chunk, chunk_positions in chunks:
+                table = pa.Table.from_pandas(self.aggregates(arrays, chunk, chunk_positions), preserve_index=False)
+                if writer is None:
+                    writer = pq.ParquetWriter(path, table.schema)
+                writer.write_table(table)
+            if writer is not None:
+                writer.close()
+        else:
+            slots = SITE_SLOTS[self.site]
+            header = slots if fmt == "dk" else slots + STAT_COLUMNS
+            with open(path, "w", newline="") as file:
+                file.write(",".join(header) + "\n")
+                for chunk, chunk_positions in chunks:
+                    if fmt == "dk":
+                        frame = pd.DataFrame(arrays["ids"][chunk], columns=SLOT_COLUMNS)
+                    else:
+                        frame = self.aggregates(arrays, chunk, chunk_positions)
+                    frame.to_csv(file, header=False, index=False)
+        print(f"Exported {len(rows)} lineups to {path}")
+
+
+def export_lineups(lineups, path, site, fmt="csv", chunk_size=5000):
+    """
+    Convenience wrapper around LineupExporter.export.
+    """
+    LineupExporter(site, chunk_size).export(lineups, path, fmt)
@@ -1,44 +1,164 @@
+import numpy as np
 import pandas as pd
 
+from data.player_pool import PlayerPool, POSITIONS
+
 def calculate_exposure(lineups, players):
     """
     Calculate player exposure in the given lineups and return a sorted DataFrame.
 
-    :param lineups: List of lineups, where each lineup is a list of (player, position, player.id) tuples.
+    :param lineups: Lineups instance.
     :param players: List of all Player objects used in the lineups.
     :return: Pandas DataFrame sorted by exposure percentage, highest to lowest.
     """
-    # Initialize a dictionary to track exposures
-    exposure_count = {player.id: 0 for player in players}
+    pool = PlayerPool.from_players(players)
     total_lineups = len(lineups)
 
     # Count the occurrences of each player in the lineups
-    for lineup in lineups:
-        for player, _, _ in lineup:
-            exposure_count[player.id] += 1
-
-    # Create a DataFrame with player data
-    data = []
-    for player in players:
-        exposure = (exposure_count[player.id] / total_lineups) * 100
-        data.append({
-            "Name": player.name,
-            "position": player.position,
-            "Team": player.team,
-            "Opp": player.opponent,
-            "Salary": player.salary,
-            "Exposure (%)": exposure,
-            "ownership": player.ownership, 
-            "leverage": exposure - player.ownership,
-            "FPTS": player.fpts,
-            "value": player.fpts / player.salary * 1000,
-            "STDDEV": player.stddev,
-            "variance score": player.stddev / player.fpts,
-            "boom": player.boom, 
-            "bust": player.bust
-        })
-
-    # Create and sort the DataFrame
-    df = pd.DataFrame(data)
+    index_map = np.array([pool.index[player] for player in lineups.players], dtype=np.int64)
+    exposure_count = np.bincount(index_map, weights=lineups.exposure(), minlength=len(pool))
+    exposure = exposure_count / total_lineups * 100
+
+    # Create the DataFrame straight from the pool columns
+    df = pd.DataFrame({
+        "Name": pool.names,
+        "position": pool.positions,
+        "Team": pool.teams,
+        "Opp": pool.opponents,
+        "Salary": pool.salary,
+        "Exposure (%)": exposure,
+        "ownership": pool.ownership,
+        "leverage": exposure - pool.ownership,
+        "FPTS": pool.fpts,
+        "value": pool.fpts / pool.salary * 1000,
+        "STDDEV": pool.stddev,
+        "variance score": pool.stddev / pool.fpts,
+        "boom": pool.boom,
+        "bust": pool.bust,
+    })
     df.sort_values(by="Exposure (%)", ascending=False, inplace=True)
     return df
+
+
+def _presence(rows, groups, num_groups):
+    """
+    (lineups x groups) 0/1 matrix of which groups (teams, games) each lineup has a player from.
+    """
+    presence = np.zeros((len(rows), num_groups), dtype=np.int8)
+    np.put_along_axis(presence, groups[rows].astype(np.int64), 1, axis=1)
+    return presence
+
+
+def _overlap_counts(selection, max_pairs, seed):
+    """
+    Histogram of shared players over lineup pairs: exact when there are at most max_pairs
+    pairs, otherwise over max_pairs uniformly sampled pairs.
+    :return: (counts per number of shared players, True if sampled).
+    """
+    num_lineups, lineup_size = len(selection), int(selection[0].sum()) if len(selection) else 0
+    counts = np.zeros(lineup_size + 1, dtype=np.int64)
+    if num_lineups < 2:
+        return counts, False
+
+    if num_lineups * (num_lineups - 1) // 2 <= max_pairs:
+        chunk = max(1, 2_000_000 // num_lineups)
+        for start in range(0, num_lineups - 1, chunk):
+            block = selection[start:start + chunk] @ selection.T
+            # Upper triangle only: pairs (i, j) with j > i
+            upper = np.arange(num_lineups) > np.arange(start, start + len(block))[:, None]
+            counts += np.bincount(block[upper].astype(np.int64), minlength=lineup_size + 1)[:lineup_size + 1]
+        return counts, False
+
+    # Sampled pairs compare packed player bitsets; popcount through a byte lookup table
+    packed = np.packbits(selection.astype(bool), axis=1)
+    popcount = np.array([bin(byte).count("1") for byte in range(256)], dtype=np.int64)
+    rng = np.random.default_rng(seed)
+    for start in range(0, max_pairs, 200_000):
+        size = min(200_000, max_pairs - start)
+        first = rng.integers(0, num_lineups, size)
+        second = (first + rng.integers(1, num_lineups, size)) % num_lineups  # Never the same lineup
+        shared = popcount[packed[first] & packed[second]].sum(axis=1)
+        counts += np.bincount(shared, minlength=lineup_size + 1)[:lineup_size + 1]
+    return counts, True
+
+
+def portfolio_metrics(lineups, max_overlap_pairs=5_000_000, seed=None):
+    """
+    Exposure and correlation metrics of a lineup pool, computed from its lineup x slot index
+    matrix. Works the same on generated pools and on pools imported with Lineups.from_csv.
+
+    Metrics (the "metric" column):
+        player   lineups containing the player
+        team     lineups with at least one player from the team
+        game     lineups with at least one player from the game
+        stack    lineups by QB team and stack shape, e.g. "BUF QB+2|1" (2 teammates, 1 runback)
+        pair     lineups containing both players, for every pair that appears together
+        overlap  lineup pairs sharing N players; "exposure (%)" is the share of pairs
+
+    :param lineups: Lineups instance.
+    :param max_overlap_pairs: Largest number of lineup pairs compared exactly; larger
+        pools sample this many pairs.
+    :param seed: Seed for the overlap pair sampling.
+    :return: Tidy DataFrame with columns metric, key, count, exposure (%).
+    """
+    pool = PlayerPool.from_players(lineups.players)
+    rows = lineups.rows.astype(np.int64)
+    num_lineups = max(len(lineups), 1)
+    frames = []
+
+    def add(metric, keys, counts, total=num_lineups):
+        frames.append(pd.DataFrame({
+            "metric": metric,
+            "key": keys,
+            "count": counts,
+            "exposure (%)": np.asarray(counts) / total * 100,
+        }))
+
+    # Player exposure and pairwise co-occurrence from the lineup x player selection matrix
+    selection = np.zeros((len(rows), len(pool)), dtype=np.float32)
+    np.put_along_axis(selection, rows, 1, axis=1)
+    player_counts = np.bincount(rows.ravel(), minlength=len(pool))
+    used = np.flatnonzero(player_counts)
+    add("player", [pool.names[i] for i in used], player_counts[used])
+
+    cooccurrence = (selection[:, used].T @ selection[:, used]).astype(np.int64)
+    first, second = np.triu_indices(len(used), k=1)
+    pair_counts = cooccurrence[first, second]
+    together = pair_counts > 0
+    first, second = used[first[together]], used[second[together]]
+    add("pair", [f"{pool.names[a]} + {pool.names[b]}" for a, b in zip(first, second)], pair_counts[together])
+
+    # Team and game exposure
+    team_counts = _presence(rows, pool.team_index, len(pool.team_names)).sum(axis=0)
+    used_teams = np.flatnonzero(team_counts)
+    add("team", [pool.team_names[i] for i in used_teams], team_counts[used_teams])
+    player_games = np.where(pool.game_index >= 0, pool.game_index, len(pool.game_keys))
+    game_counts = _presence(rows, player_games, len(pool.game_keys) + 1).sum(axis=0)[:len(pool.game_keys)]
+    used_games = np.flatnonzero(game_counts)
+    add("game", ["@".join(pool.game_keys[i]) for i in used_games], game_counts[used_games])
+
+    # Stack shape per lineup: QB team, teammates and runbacks (DST excluded)
+    qb_code, dst_code = POSITIONS.index("QB"), POSITIONS.index("DST")
+    has_qb = (lineups.positions == qb_code).any(axis=1)
+    qb = rows[np.arange(len(rows)), np.argmax(lineups.positions == qb_code, axis=1)]
+    teams = pool.team_index[rows]
+    offense = pool.position_index[rows] != dst_code
+    stack = (offense & (teams == pool.team_index[qb][:, None])).sum(axis=1) - 1
+    runback = (offense & (teams == pool.opponent_index[qb][:, None])).sum(axis=1)
+    width = rows.shape[1] + 1
+    stack_code = (pool.team_index[qb] * width + stack) * width + runback
+    codes, counts = np.unique(stack_code[has_qb], return_counts=True)
+    add(
+        "stack",
+        [f"{pool.team_names[code // width // width]} QB+{code // width % width}|{code % width}" for code in codes],
+        counts,
+    )
+
+    overlap, sampled = _overlap_counts(selection, max_overlap_pairs, seed)
+    if sampled:
+        print(f"Lineup overlap estimated from {max_overlap_pairs} sampled pairs.")
+    add("overlap", np.arange(len(overlap)), overlap, total=max(overlap.sum(), 1))
+
+    metrics = pd.concat(frames, ignore_index=True)
+    metrics["key"] = metrics["key"].astype(str)
+    return metrics
@@ -1,123 +1,169 @@
 import numpy as np
+import pandas as pd
 
+from data.data_manager import ENTRY_SLOTS
+from data.player_pool import POSITIONS
 
-class Lineups:
-    def __init__(self):
-        self.lineups = []
+LINEUP_SIZE = 9
+# Sort key of each position code (QB, RB, WR, TE, DST, FLEX) for DK slot order: FLEX before DST
+DK_SLOT_ORDER = np.array([0, 1, 2, 3, 5, 4], dtype=np.int8)
 
-    def add_lineup(self, lineup):
-        """Add a new lineup to the collection."""
-        formatted_lineup = [
-            (player, pos, player.id) for player, pos in lineup
-        ]
-        self.lineups.append(formatted_lineup)
-
-    def sort_lineup(self, lineup, site):
-        """Sort a lineup by position based on the site-specific rules."""
-        if site == "dk":
-            order = ["QB", "RB", "RB", "WR", "WR", "WR", "TE", "FLEX", "DST"]
-            sorted_lineup = [None] * 9
-        else:
-            order = ["PG", "PG", "SG", "SG", "SF", "SF", "PF", "PF", "C"]
-            sorted_lineup = [None] * 9
-
-        for player, pos, player_id in lineup:
-            order_idx = order.index(pos)
-            if sorted_lineup[order_idx] is None:
-                sorted_lineup[order_idx] = (player, pos, player_id)
-            else:
-                # Find the next available slot for this position
-                next_idx = order_idx + 1
-                while next_idx < len(sorted_lineup) and sorted_lineup[next_idx] is not None:
-                    next_idx += 1
-                if next_idx < len(sorted_lineup):
-                    sorted_lineup[next_idx] = (player, pos, player_id)
-
-        return [slot for slot in sorted_lineup if slot is not None]  # Remove None values
 
+class Lineups:
+    """
+    Lineups stored as a (lineups x 9) int32 array of indices into self.players plus a
+    matching int8 array of slot position codes (indices into POSITIONS). The arrays grow
+    by doubling, so add_lineup is amortized O(1); a lineup costs 45 bytes.
+    """
+
+    def __init__(self, players=None, capacity=64):
+        self.players = list(players or [])
+        self.player_index = {player: i for i, player in enumerate(self.players)}
+        self._rows = np.zeros((capacity, LINEUP_SIZE), dtype=np.int32)
+        self._positions = np.zeros((capacity, LINEUP_SIZE), dtype=np.int8)
+        self._count = 0
+
+    @classmethod
+    def from_arrays(cls, players, rows, positions):
+        """
+        Wrap existing arrays without copying them (e.g. memory-mapped ones from load()).
+        :param players: Player objects the rows index into.
+        :param rows: (lineups x 9) player indices.
+        :param positions: (lineups x 9) position codes.
+        """
+        lineups = cls(players, capacity=0)
+        lineups._rows = rows
+        lineups._positions = positions
+        lineups._count = len(rows)
+        return lineups
+
+    @classmethod
+    def from_csv(cls, path, players):
+        """
+        Import lineups from a CSV whose first nine columns are the DK slots (QB, RB, RB, WR,
+        WR, WR, TE, FLEX, DST) holding player IDs or "Name (ID)" cells, such as our own
+        exports or a DK upload file.
+        :param path: Path of the CSV.
+        :param players: Player objects to match the IDs against.
+        :raises ValueError: If a cell does not match the ID of one of the players.
+        """
+        cells = pd.read_csv(path, usecols=range(LINEUP_SIZE), dtype=str).to_numpy().ravel()
+        ids = pd.Series(cells).str.extract(r"(\d+)\)?\s*$", expand=False)
+        rows = ids.map({str(player.id): i for i, player in enumerate(players)})
+        if rows.isna().any():
+            raise ValueError(f"{int(rows.isna().sum())} cells in {path} do not match a player ID.")
+
+        rows = rows.to_numpy(dtype=np.int32).reshape(-1, LINEUP_SIZE)
+        slot_codes = np.array([POSITIONS.index(slot) for slot in ENTRY_SLOTS], dtype=np.int8)
+        return cls.from_arrays(players, rows, np.tile(slot_codes, (len(rows), 1)))
+
+    @property
+    def rows(self):
+        return self._rows[:self._count]
+
+    @property
+    def positions(self):
+        return self._positions[:self._count]
+
+    @property
+    def lineups(self):
+        """Lineups as lists of (player, position, player.id) tuples."""
+        return [
+            [(self.players[row], POSITIONS[pos], self.players[row].id) for row, pos in zip(rows, positions)]
+            for rows, positions in zip(self.rows.tolist(), self.positions.tolist())
+        ]
 
-    def export_to_csv(self, file_path, site):
-        """Export the lineups to a CSV file."""
-        with open(file_path, "w") as f:
-            if site == "dk":
-                f.write(
-                    "QB,RB,RB,WR,WR,WR,TE,FLEX,DST,Salary,Fpts Proj,Own. Prod.,Own. Sum.,Team Stack,Runback,Stack Positions,Runback Positions,Max Non-QB Team Players,Offensive vs Defensive,Ownership Array\n"
-                )
-            else:
-                f.write(
-                    "PG,PG,SG,SG,SF,SF,PF,PF,C,Salary,Fpts Proj,Own. Prod.,Own. Sum.,Minutes,StdDev,Max Non-QB Team Players,Offensive vs Defensive,Ownership Array\n"
-                )
-
-            for lineup in self.lineups:
-                # Sort the lineup according to the site's position order
-                sorted_lineup = self.sort_lineup(lineup, site)
-
-                # Calculate aggregate stats
-                salary = sum(player.salary for player, _, _ in sorted_lineup)
-                fpts_p = sum(player.fpts for player, _, _ in sorted_lineup)
-                own_p = np.prod([player.ownership / 100 for player, _, _ in sorted_lineup])
-                own_s = sum(player.ownership for player, _, _ in sorted_lineup)
-
-                # Identify QB team and opponent
-                qb = next((player for player, pos, _ in sorted_lineup if pos == "QB"), None)
-                qb_team = qb.team
-                qb_opponent = qb.opponent
-
-                # Calculate stack and runback details
-                stack_positions = []
-                runback_positions = []
-                team_stack_count = 0
-                runback_count = 0
-                max_non_qb_team_players = 0
-                offensive_count = 0
-                defensive_count = 0
-
-                # Track non-QB team players and offensive/defensive players
-                non_qb_team_players = {}
-                ownership_array = []
-
-                for player, pos, _ in sorted_lineup:
-                    ownership_array.append(player.ownership)
-                    if pos != "DST":
-                        offensive_count += 1
-
-                        if player.team != qb_team and player.team != qb_opponent:
-                            if player.team not in non_qb_team_players:
-                                non_qb_team_players[player.team] = 0
-                            non_qb_team_players[player.team] += 1
-
-                        if player.team == qb_team and pos != "QB":
-                            team_stack_count += 1
-                            stack_positions.append(pos)
-                        elif player.team == qb_opponent:
-                            runback_count += 1
-                            runback_positions.append(pos)
-                    else:
-                        defensive_count += 1
-
-                if non_qb_team_players:
-                    max_non_qb_team_players = max(non_qb_team_players.values())
-
-                # Generate stack strings
-                team_stack_str = f"QB +{team_stack_count} | {runback_count}"
-                stack_positions_str = f"{'; '.join(stack_positions)},{'; '.join(runback_positions)}"
-
-                # Format ownership array as a line-separated string for Excel readability
-                ownership_array_str = "|".join(map(str, ownership_array))
-
-                # Create the lineup string
-                lineup_str = ",".join(
-                    [f"{player.name} ({player.id})" for player, _, _ in sorted_lineup]
-                )
-                f.write(
-                    f"{lineup_str},{salary},{round(fpts_p, 2)},{own_p},{own_s},{team_stack_str},{runback_count},{stack_positions_str},{max_non_qb_team_players},{offensive_count}/{defensive_count},\"{ownership_array_str}\"\n"
-                )
+    def _player_row(self, player):
+        row = self.player_index.get(player)
+        if row is None:
+            row = self.player_index[player] = len(self.players)
+            self.players.append(player)
+        return row
 
+    def add_lineup(self, lineup):
+        """Add a new lineup of (player, position) pairs to the collection."""
+        if self._count == len(self._rows):
+            capacity = max(64, 2 * len(self._rows))
+            self._rows = np.resize(self._rows, (capacity, LINEUP_SIZE))
+            self._positions = np.resize(self._positions, (capacity, LINEUP_SIZE))
+        for slot, (player, pos) in enumerate(lineup):
+            self._rows[self._count, slot] = self._player_row(player)
+            self._positions[self._count, slot] = POSITIONS.index(pos)
+        self._count += 1
+
+    def set_arrays(self, rows, positions):
+        """Replace all lineups with new (lineups x 9) row and position arrays."""
+        self._rows = np.ascontiguousarray(rows, dtype=np.int32)
+        self._positions = np.ascontiguousarray(positions, dtype=np.int8)
+        self._count = len(self._rows)
+
+    def slot_ordered(self):
+        """
+        :return: (rows, positions) with every lineup in DK slot order
+            (QB, RB, RB, WR, WR, WR, TE, FLEX, DST).
+        """
+        order = np.argsort(DK_SLOT_ORDER[self.positions], axis=1, kind="stable")
+        return np.take_along_axis(self.rows, order, axis=1), np.take_along_axis(self.positions, order, axis=1)
+
+    def sort_slots(self):
+        """Put every lineup in DK slot order."""
+        self.set_arrays(*self.slot_ordered())
+
+    def exposure(self):
+        """
+        :return: Number of lineups each of self.players appears in.
+        """
+        return np.bincount(self.rows.ravel(), minlength=len(self.players))
+
+    def selection_matrix(self):
+        """
+        :return: (lineups x players) 0/1 matrix.
+        """
+        selection = np.zeros((len(self), len(self.players)), dtype=np.int32)
+        np.put_along_axis(selection, self.rows.astype(np.int64), 1, axis=1)
+        return selection
+
+    def overlap(self, indices=None):
+        """
+        Number of players each lineup shares with the lineups in indices.
+        :param indices: Lineup indices to compare against every lineup; all lineups if None.
+        :return: (len(indices) x lineups) matrix of shared player counts.
+        """
+        selection = self.selection_matrix()
+        rows = selection if indices is None else selection[np.atleast_1d(indices)]
+        return rows @ selection.T
+
+    def save(self, path):
+        """
+        Save the rows and positions as one .npy record array. Players are not saved;
+        pass the same players list to load().
+        """
+        records = np.empty(len(self), dtype=[("rows", np.int32, LINEUP_SIZE), ("positions", np.int8, LINEUP_SIZE)])
+        records["rows"] = self.rows
+        records["positions"] = self.positions
+        np.save(path, records)
+
+    @classmethod
+    def load(cls, path, players, mmap_mode="r"):
+        """
+        Load lineups saved with save(), memory-mapped by default (read-only until the
+        first add_lineup, which copies into a new buffer).
+        :param path: Path of the .npy file.
+        :param players: The players list the lineups were saved against.
+        """
+        records = np.load(path, mmap_mode=mmap_mode)
+        if len(records) and records["rows"].max() >= len(players):
+            raise ValueError(f"Lineups in {path} reference {records['rows'].max() + 1} players, got {len(players)}.")
+        return cls.from_arrays(players, records["rows"], records["positions"])
 
+    def export_to_csv(self, file_path, site):
+        """Export the lineups with their aggregate stats to a CSV file."""
+        from lineups.exporter import export_lineups
 
+        export_lineups(self, file_path, site, "csv")
 
     def __len__(self):
-        return len(self.lineups)
+        return self._count
     
     
 
@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from data.player_pool import POSITIONS
+from lineups.lineups import Lineups
+
+CACHE_VERSION = 1
+
+
+class ResultCache:
+    """
+    Content-addressed cache of generated lineup pools. The key hashes the input files,
+    the config (including "random_seed") and the run parameters, so an unchanged re-run
+    loads its lineups, stage-1 baseline and exposure table instead of re-solving. Only
+    seeded runs are cacheable: without "random_seed" the key cannot capture the sampled
+    projections, so main.py neither loads nor stores entries for unseeded runs.
+    Entries are compressed .npz files; the least recently used ones are evicted once the
+    directory grows past max_size_mb.
+    """
+
+    def __init__(self, directory, max_size_mb=200):
+        self.directory = directory
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+
+    @staticmethod
+    def config_hash(config):
+        """
+        :return: Hex digest of the configuration dictionary.
+        """
+        return hashlib.sha256(json.dumps(config, sort_keys=True, default=str).encode()).hexdigest()
+
+    def key(self, input_paths, config, **params):
+        """
+        Hash the contents of the input files, the config and the run parameters.
+        :param input_paths: Paths of the input files (projections, player ids).
+        :param config: The loaded configuration dictionary.
+        :param params: Other run parameters, e.g. site, num_lineups, num_uniques.
+        :return: Hex digest used as the cache key.
+        """
+        digest = hashlib.sha256(f"v{CACHE_VERSION}".encode())
+        for path in input_paths:
+            with open(path, "rb") as file:
+                for chunk in iter(lambda: file.read(1 << 20), b""):
+                    digest.update(chunk)
+        digest.update(json.dumps(config, sort_keys=True, default=str).encode())
+        digest.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return digest.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.npz")
+
+    def load(self, key, players):
+        """
+        Load a cached result.
+        :param key: Cache key from key().
+        :param players: Current Player objects, matched to the cached lineups by id.
+        :return: Dictionary with "lineups", "baseline" and "exposure", or None on a miss.
+        """
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+
+        with np.load(path, allow_pickle=False) as data:
+            player_ids = data["player_ids"].tolist()
+            rows = data["lineup_rows"]
+            positions = data["lineup_positions"]
+            baseline = json.loads(str(data["baseline"]))
+            exposure = pd.DataFrame(json.loads(str(data["exposure"])))
+
+        players_by_id = {str(player.id): player for player in players}
+        if any(player_id not in players_by_id for player_id in player_ids):
+            return None  # Cached players no longer in the pool; treat as a miss
+
+        lineups = Lineups.from_arrays([players_by_id[player_id] for player_id in player_ids], rows, positions)
+
+        os.utime(path)  # Mark as recently used for eviction
+        return {"lineups": lineups, "baseline": baseline, "exposure": exposure}
+
+    def store(self, key, lineups, baseline, exposure_df):
+        """
+        Store a result and evict old entries if the cache is over its size limit.
+        :param key: Cache key from key().
+        :param lineups: Lineups instance.
+        :param baseline: Stage-1 baseline dictionary (may be None).
+        :param exposure_df: Exposure DataFrame from calculate_exposure.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        # Only keep the players the lineups use
+        used, rows = np.unique(lineups.rows, return_inverse=True)
+        player_ids = [str(lineups.players[row].id) for row in used]
+        rows = rows.reshape(lineups.rows.shape).astype(np.int32)
+        positions = lineups.positions
+
+        path = self._path(key)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            player_ids=np.array(player_ids, dtype=str),
+            lineup_rows=rows,
+            lineup_positions=positions,
+            baseline=np.array(json.dumps(baseline)),
+            exposure=np.array(exposure_df.to_json(orient="columns")),
+        )
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def _last_run_path(self, site):
+        return os.path.join(self.directory, f"last_run_{site}.npz")
+
+    def store_last_run(self, site, players, lineups, baseline, config):
+        """
+        Snapshot the player pool and lineups of the latest run for incremental re-optimization.
+        Kept apart from the keyed entries and never evicted.
+        :param site: Site of the run ("dk" or "fd").
+        :param players: Player objects the run was optimized over.
+        :param lineups: Lineups instance produced by the run.
+        :param baseline: Stage-1 baseline dictionary.
+        :param config: The run's configuration; only its hash is stored, so a later run can
+            tell whether the baseline was solved under the same settings.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        player_ids = [str(player.id) for player in players]
+        id_index = {player_id: i for i, player_id in enumerate(player_ids)}
+        index_map = np.array([id_index[str(player.id)] for player in lineups.players], dtype=np.int32)
+        rows = index_map[lineups.rows]
+        positions = lineups.positions
+
+        path = self._last_run_path(site)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez_compressed(
+            tmp_path,
+            player_ids=np.array(player_ids, dtype=str),
+            fpts=np.array([player.fpts for player in players], dtype=float),
+            ownership=np.array([player.ownership for player in players], dtype=float),
+            salary=np.array([player.salary for player in players], dtype=float),
+            stddev=np.array([player.stddev for player in players], dtype=float),
+            lineup_rows=rows,
+            lineup_positions=positions,
+            baseline=np.array(json.dumps(baseline)),
+            config_hash=np.array(self.config_hash(config)),
+        )
+        os.replace(tmp_path, path)
+
+    def load_last_run(self, site):
+        """
+        :param site: Site of the run ("dk" or "fd").
+        :return: Dictionary with the previous run's "player_ids", "fpts", "ownership", "salary",
+            "stddev" arrays, "lineups" as (row, position) lists, "baseline" and "config_hash"
+            (None for older snapshots), or None.
+        """
+        path = self._last_run_path(site)
+        if not os.path.exists(path):
+            return None
+        with np.load(path, allow_pickle=False) as data:
+            return {
+                "player_ids": data["player_ids"].tolist(),
+                "fpts": data["fpts"],
+                "ownership": data["ownership"],
+                "salary": data["salary"],
+                "stddev": data["stddev"],
+                "lineups": [
+                    [(int(row), POSITIONS[position]) for row, position in zip(lineup_rows, lineup_positions)]
+                    for lineup_rows, lineup_positions in zip(data["lineup_rows"], data["lineup_positions"])
+                ],
+                "baseline": json.loads(str(data["baseline"])),
+                "config_hash": str(data["config_hash"]) if "config_hash" in data else None,
+            }
+
+    def evict(self):
+        """
+        Delete least recently used entries until the cache fits in max_size_bytes.
+        """
+        entries = [
+            os.path.join(self.directory, name)
+            for name in os.listdir(self.directory)
+            if name.endswith(".npz") and not name.startswith("last_run_")
+        ]
+        entries.sort(key=os.path.getmtime)
+        total = sum(os.path.getsize(path) for path in entries)
+        while entries and total > self.max_size_bytes:
+            oldest = entries.pop(0)
+            total -= os.path.getsize(oldest)
+            os.remove(oldest)
@@ -1,21 +1,46 @@
+import argparse
+import os
+from datetime import datetime
+
 import pandas as pd
 
 from data.data_manager import DataManager
 from optimizer.optimizer import Optimizer
-from lineups.lineup_metrics import calculate_exposure
+from optimizer.incremental import reoptimize
+from optimizer.late_swap import late_swap_entries, export_late_swap
+from lineups.lineup_metrics import calculate_exposure, portfolio_metrics
+from lineups.result_cache import ResultCache
+from lineups.exporter import export_lineups
+from lineups.contest_simulator import simulate_contest
+from instrumentation import instrumentation
 
 ### Entry point of the application
 
 def main():
+    parser = argparse.ArgumentParser(description="Generate NFL DFS lineups.")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and do not update the result cache.")
+    parser.add_argument(
+        "--incremental", action="store_true",
+        help="Keep the still-valid lineups of the last run and only re-solve the rest.",
+    )
+    parser.add_argument("--simulate", action="store_true", help="Simulate a GPP with the generated lineups.")
+    parser.add_argument("--late-swap", action="store_true", help="Late swap the entries in late_swap_path.")
+    parser.add_argument(
+        "--now", default=None,
+        help="Time to lock players against for late swap, as 'YYYY-MM-DD HH:MM' Eastern. Defaults to now.",
+    )
+    args = parser.parse_args()
+
     pd.set_option('display.max_rows', None)
     pd.set_option('display.max_columns', None)
     pd.set_option('display.width', None)
     pd.set_option('display.max_colwidth', None)
     # Initialize DataManager for the desired site (e.g., 'dk')
     site = "dk"  # Or "fd" depending on the use case
-    process = 'main'
+    process = 'late_swap' if args.late_swap else 'main'
 
     data_manager = DataManager(site)
+    instrumentation.configure(data_manager.config.get("instrumentation", {}))
 
     # Load player data
     try:
@@ -50,25 +75,107 @@ def main():
         num_uniques = 1 # Minimum unique players between lineups
         optimizer = Optimizer(site, players, num_lineups, num_uniques, data_manager.config)
 
-        # Generate lineups
-        lineups = optimizer.run()
-
-        # Calculate and display player exposure
-        exposure_df = calculate_exposure(lineups.lineups, players)
+        # Reuse the lineups of an identical earlier run if the result cache has them. Only
+        # seeded runs are cached: an unseeded run draws new lineups every time.
+        cache_settings = data_manager.config.get("result_cache", {})
+        result_cache = None
+        cache_key = None
+        cached = None
+        if cache_settings.get("enabled", False) and not args.no_cache:
+            result_cache = ResultCache(
+                os.path.join(data_manager.get_project_root(), cache_settings.get("directory", "data/cache")),
+                cache_settings.get("max_size_mb", 200),
+            )
+            if data_manager.config.get("random_seed") is not None:
+                cache_key = result_cache.key(
+                    data_manager.input_paths(), data_manager.config,
+                    site=site, num_lineups=num_lineups, num_uniques=num_uniques,
+                )
+                cached = result_cache.load(cache_key, players)
+            else:
+                print("Result cache skipped: set random_seed to cache lineup pools.")
+
+        if cached is not None:
+            print(f"Loaded {len(cached['lineups'])} lineups from the result cache.")
+            print(f"Baseline: {cached['baseline']}")
+            lineups = cached["lineups"]
+            exposure_df = cached["exposure"]
+        else:
+            # Generate lineups
+            with instrumentation.profile():
+                if args.incremental:
+                    previous = result_cache.load_last_run(site) if result_cache is not None else None
+                    lineups = reoptimize(optimizer, previous)
+                else:
+                    lineups = optimizer.run()
+
+            # Calculate player exposure
+            exposure_df = calculate_exposure(lineups, players)
+            if cache_key is not None:
+                result_cache.store(cache_key, lineups, optimizer.baseline, exposure_df)
+            if result_cache is not None:
+                result_cache.store_last_run(site, players, lineups, optimizer.baseline, data_manager.config)
+
+        # Display player exposure
         print(exposure_df)
 
-        # Export the lineups
-        lineups.export_to_csv("C:/Users/samba/nfl_dfs/data/output/optimal_lineups.csv", site=optimizer.site)
+        # Display team, game and stack exposure
+        metrics = portfolio_metrics(lineups)
+        print(metrics[metrics["metric"].isin(["team", "game", "stack"])])
 
-    else :
-        pass # put late swap logic here, when it works. 
+        # Export the lineups
+        export_settings = data_manager.config.get("export", {})
+        export_lineups(
+            lineups,
+            data_manager._resolve_path(export_settings.get("path", "data/output/optimal_lineups.csv")),
+            site,
+            export_settings.get("format", "csv"),
+            export_settings.get("chunk_size", 5000),
+        )
+
+        # Estimate win rates and ROI against a simulated field
+        if args.simulate:
+            results = simulate_contest(
+                lineups, players, data_manager.config,
+                data_manager._resolve_path(data_manager.config.get("contest_structure_path", "contest_structure.csv")),
+            )
+            print("Contest sim ROI treats the projections as true means: read it as an upper bound.")
+            print(results.sort_values("ROI %", ascending=False).head(20))
+            sim_path = data_manager._resolve_path(
+                data_manager.config.get("contest_sim", {}).get("output_path", "data/output/contest_sim.csv")
+            )
+            os.makedirs(os.path.dirname(sim_path), exist_ok=True)
+            results.to_csv(sim_path, index=False)
+
+    else:
+        if args.now:
+            current_time = data_manager.eastern.localize(datetime.strptime(args.now, "%Y-%m-%d %H:%M"))
+        else:
+            current_time = datetime.now(data_manager.eastern)
+        try:
+            data_manager.load_player_lineups(
+                data_manager._resolve_path(data_manager.config["late_swap_path"]), current_time
+            )
+        except FileNotFoundError as e:
+            print(f"Error: {e}")
+            return
+
+        locked_ids = data_manager.locked_player_ids(current_time)
+        print(f"{len(locked_ids)} players locked at {current_time}")
+        results = late_swap_entries(site, players, data_manager.config, data_manager.lineups, locked_ids)
+        export_late_swap(
+            data_manager._resolve_path(data_manager.config.get("late_swap_output_path", "data/output/late_swap_lineups.csv")),
+            data_manager.lineups,
+            results,
+        )
+
+    instrumentation.finish()
 
 
 
 if __name__ == "__main__":
     main()
 
-#TODO: lateswap - test after lock to dial in lock constraint. need to check that the player.gametime matches the new and old format. 
 #TODO: modularize logic to be able to use with other sports, with a few additions
     ###wrangle constraints all into the constraints class. 
         ### could have different functions for different sports' constraints? i.e. add_{sport}_constraints()
@@ -1,31 +1,115 @@
-from pulp import lpSum, LpVariable
+import time
+from collections import defaultdict
+
+from pulp import lpSum, LpVariable, LpAffineExpression
+
+from data.player_pool import PlayerPool, POSITIONS
+from instrumentation import instrumentation
 
 
 class ConstraintManager:
-    def __init__(self, site, problem, players, lp_variables, config):
+    # Slots a FLEX player can come from, and their combined count in a DK lineup
+    FLEX_POSITIONS = ("RB", "WR", "TE")
+    FLEX_TOTAL = 7
+
+    def __init__(self, site, problem, players, lp_variables, config, compact=False, slate_qbs=None):
+        """
+        :param compact: lp_variables holds one variable per player, keyed by its primary
+            position, and FLEX is enforced through position counts (see Optimizer.compact).
+        :param slate_qbs: QBs of the full slate, which decide the team limit rows when
+            players holds only part of the slate (QB decomposition); defaults to its QBs.
+        """
         self.site = site
+        self.compact = compact
         self.problem = problem
         self.players = players
         self.lp_variables = lp_variables
         self.config = config
+        self.slate_qbs = slate_qbs
+        self.pool = PlayerPool.from_players(players)  # Columnar view aligned to self.players
         self.qb_selected_vars = {}  # Dictionary to store QB selection variables (keyed by player)
+        self.build_time = None  # Seconds spent in add_static_constraints
+        self.duplicate_rows = 0  # Constraints skipped because an identical row already exists
+        self._row_keys = set()
+
+        # Index the LP variables once; every constraint family is generated from these
+        self.players_by_position = defaultdict(list)
+        self.vars_by_player = defaultdict(list)
+        self.vars_by_position = defaultdict(list)
+        self.vars_by_team = defaultdict(list)
+        self.vars_by_team_position = defaultdict(list)
+        for (player, position), var in self.lp_variables.items():
+            self.players_by_position[position].append(player)
+            self.vars_by_player[player].append(var)
+            self.vars_by_position[position].append(var)
+            self.vars_by_team[player.team].append(var)
+            self.vars_by_team_position[(player.team, position)].append(var)
+        self.teams = sorted(self.vars_by_team)
+
+    def _weighted_sum(self, values):
+        """
+        Sum of every player/position variable weighted by a pool column aligned to self.players.
+        """
+        return LpAffineExpression(
+            (var, value)
+            for player, value in zip(self.players, values.tolist())
+            for var in self.vars_by_player[player]
+        )
 
+    def _team_vars(self, team, positions):
+        """
+        Variables of a team's players in the given slots. The compact model has no FLEX
+        variables, so its players count by primary position and FLEX stands for RB/WR/TE.
+        """
+        if self.compact:
+            positions = {
+                pos for slot in positions for pos in (self.FLEX_POSITIONS if slot == "FLEX" else (slot,))
+            }
+        return [var for pos in positions for var in self.vars_by_team_position.get((team, pos), [])]
 
-    def add_salary_constraints(self):
-        max_salary = 50000 if self.site == "dk" else 60000
-        min_salary = self.config.get("min_lineup_salary") if self.site == "dk" else 59000
+    def _add_constraint(self, constraint, name):
+        """
+        Add a constraint unless an identical row (same coefficients, sense and bound) already exists.
+        """
+        key = (
+            frozenset((var.name, coefficient) for var, coefficient in constraint.items()),
+            constraint.sense,
+            constraint.constant,
+        )
+        if key in self._row_keys:
+            self.duplicate_rows += 1
+            return
+        self._row_keys.add(key)
+        self.problem += constraint, name
+
+    def model_size(self):
+        """
+        Summarize the size of the model built so far.
+        :return: Dictionary with rows, nonzeros, variables, duplicate rows skipped and build ms.
+        """
+        return {
+            "rows": len(self.problem.constraints),
+            "nonzeros": sum(len(constraint) for constraint in self.problem.constraints.values()),
+            "variables": len(self.problem.variables()),
+            "duplicate_rows_skipped": self.duplicate_rows,
+            "build_ms": self.build_time * 1000 if self.build_time is not None else None,
+        }
+
+    @staticmethod
+    def salary_limits(site, config):
+        """
+        :return: (min_salary, max_salary) of a lineup on the site.
+        """
+        max_salary = 50000 if site == "dk" else 60000
+        min_salary = config.get("min_lineup_salary") if site == "dk" else 59000
+        return min_salary, max_salary
 
-        self.problem += lpSum(
-            player.salary * self.lp_variables[(player, position)]
-            for player in self.players
-            for position in player.position
-        ) <= max_salary, "Max_Salary"
+    def add_salary_constraints(self):
+        min_salary, max_salary = self.salary_limits(self.site, self.config)
 
-        self.problem += lpSum(
-            player.salary * self.lp_variables[(player, position)]
-            for player in self.players
-            for position in player.position
-        ) >= min_salary, "Min_Salary"
+        lineup_salary = self._weighted_sum(self.pool.salary)
+        self._add_constraint(lineup_salary <= max_salary, "Max_Salary")
+        self._add_constraint(lineup_salary >= min_salary, "Min_Salary")
 
     def add_position_constraints(self):
         # Hard-coded position constraints
@@ -36,18 +120,25 @@ class ConstraintManager:
         else:  # Assuming "fd"
             return
 
+        if self.compact:
+            # Primary slots are minimums; the FLEX player is whichever RB/WR/TE exceeds them
+            for pos, limit in position_limits.items():
+                if pos in self.FLEX_POSITIONS:
+                    self._add_constraint(lpSum(self.vars_by_position[pos]) >= limit, f"Position_{pos}")
+                elif pos != "FLEX":
+                    self._add_constraint(lpSum(self.vars_by_position[pos]) == limit, f"Position_{pos}")
+            flex_vars = [var for pos in self.FLEX_POSITIONS for var in self.vars_by_position[pos]]
+            self._add_constraint(lpSum(flex_vars) == self.FLEX_TOTAL, "Position_FLEX")
+            return
+
         for pos, limit in position_limits.items():
-            eligible = [(player, pos) for player in self.players if pos in player.position]
-            self.problem += lpSum(self.lp_variables[key] for key in eligible) == limit, f"Position_{pos}"
+            self._add_constraint(lpSum(self.vars_by_position[pos]) == limit, f"Position_{pos}")
 
     def add_global_team_limit(self):
         global_limit = self.config.get("global_team_limit")
         if global_limit:
-            for team in set(player.team for player in self.players):
-                eligible = [
-                    (player, pos) for player in self.players for pos in player.position if player.team == team
-                ]
-                self.problem += lpSum(self.lp_variables[key] for key in eligible) <= global_limit, f"Global_Team_{team}"
+            for team in self.teams:
+                self._add_constraint(lpSum(self.vars_by_team[team]) <= global_limit, f"Global_Team_{team}")
 
     def exclude_exact_lineup(self, lineup, lineup_index):
         """
@@ -63,16 +154,23 @@ class ConstraintManager:
     def add_qb_selection_variables(self):
         """
         Centralize the logic to create and store binary variables for whether a QB is selected.
+        A DK pool with a single QB (QB decomposition) always plays that QB, so its stack and
+        runback rows use the constant 1 and need no selection variable.
         """
-        for qb, _ in [
-            (player, pos) for player in self.players for pos in player.position if pos == "QB"
-        ]:
-            if qb not in self.qb_selected_vars:
+        if self.site == "dk" and len(self.players_by_position["QB"]) == 1:
+            self.qb_selected_vars[self.players_by_position["QB"][0]] = 1
+            return
+
+        for qb in self.players_by_position["QB"]:
+            if self.compact:
+                # A compact QB has a single variable, which is its selection variable
+                self.qb_selected_vars[qb] = self.lp_variables[(qb, "QB")]
+            elif qb not in self.qb_selected_vars:
                 # Create the binary variable for whether the QB is selected
                 qb_selected = LpVariable(f"qb_{qb.name}_selected", 0, 1, cat="Binary")
 
                 # Link the QB selection variable to the QB LP variable
-                self.problem += (
+                self._add_constraint(
                     qb_selected == lpSum(self.lp_variables[(qb, "QB")]),
                     f"Select_QB_{qb.name}"
                 )
@@ -89,25 +187,17 @@ class ConstraintManager:
         min_stack = qb_stack_config.get("min_stack", 1)  # Default to 1
         eligible_positions = qb_stack_config.get("positions", ["WR", "TE"])  # Default to WR and TE
 
-        for qb, _ in [
-            (player, pos) for player in self.players for pos in player.position if pos == "QB"
-        ]:
+        for qb in self.players_by_position["QB"]:
             # Get eligible stack players (WR/TE) from the same team as the QB
-            eligible_stack_players = [
-                (player, pos)
-                for player in self.players
-                for pos in player.position
-                if pos in eligible_positions and player.team == qb.team
-            ]
-
-            if eligible_stack_players:
+            eligible_stack_vars = self._team_vars(qb.team, eligible_positions)
+
+            if eligible_stack_vars:
                 # Reuse the pre-defined QB selection variable
                 qb_selected = self.qb_selected_vars[qb]
 
                 # Enforce stacking only if the QB is selected
-                self.problem += (
-                    lpSum(self.lp_variables[key] for key in eligible_stack_players)
-                    >= min_stack * qb_selected,
+                self._add_constraint(
+                    lpSum(eligible_stack_vars) >= min_stack * qb_selected,
                     f"QB_Stack_{qb.name}_Min_stack_{min_stack}",
                 )
 
@@ -122,28 +212,17 @@ class ConstraintManager:
         min_runback = qb_runback_config.get("min_runback", 1)  # Default to 1
         eligible_positions = qb_runback_config.get("positions", ["WR", "RB"])  # Default to WR and RB
 
-        for qb, _ in [
-            (player, pos) for player in self.players for pos in player.position if pos == "QB"
-        ]:
-            # Identify the opposing team for the QB
-            opposing_team = qb.opponent
-
+        for qb in self.players_by_position["QB"]:
             # Get eligible runback players (e.g., WR/RB) from the opposing team
-            eligible_runback_players = [
-                (player, pos)
-                for player in self.players
-                for pos in player.position
-                if pos in eligible_positions and player.team == opposing_team
-            ]
-
-            if eligible_runback_players:
+            eligible_runback_vars = self._team_vars(qb.opponent, eligible_positions)
+
+            if eligible_runback_vars:
                 # Reuse the pre-defined QB selection variable
                 qb_selected = self.qb_selected_vars[qb]
 
                 # Enforce runback only if the QB is selected
-                self.problem += (
-                    lpSum(self.lp_variables[key] for key in eligible_runback_players)
-                    >= min_runback * qb_selected,
+                self._add_constraint(
+                    lpSum(eligible_runback_vars) >= min_runback * qb_selected,
                     f"QB_Runback_{qb.name}_Min_runback_{min_runback}",
                 )
 
@@ -160,33 +239,31 @@ class ConstraintManager:
             return  # If not specified, no constraint is applied
 
         # Loop through each defense (DST) player
-        for defense in [p for p in self.players if "DST" in p.position]:
+        for defense in self.players_by_position["DST"]:
             # Identify the opposing team for this defense
             opposing_team = defense.opponent
 
-            # Get all offensive players from the opposing team
-            offensive_players = [
-                (player, pos)
-                for player in self.players
-                for pos in player.position
-                if player.team == opposing_team and pos != "DST"
-            ]
-
-            if offensive_players:
-                # Create a binary decision variable for whether the defense (DST) is selected
-                defense_selected = LpVariable(f"defense_{defense.team}_selected", 0, 1, cat="Binary")
-
-                # Link the defense selection variable with the defense LP variable
-                self.problem += (
-                    defense_selected == lpSum(self.lp_variables[(defense, pos)] for pos in defense.position),
-                    f"Select_Defense_{defense.team}"
-                )
+            # Get all offensive player variables from the opposing team
+            offensive_vars = self._team_vars(opposing_team, [pos for pos in POSITIONS if pos != "DST"])
+
+            if offensive_vars:
+                if self.compact:
+                    defense_selected = self.vars_by_player[defense][0]
+                else:
+                    # Create a binary decision variable for whether the defense (DST) is selected
+                    defense_selected = LpVariable(f"defense_{defense.team}_selected", 0, 1, cat="Binary")
+
+                    # Link the defense selection variable with the defense LP variable
+                    self._add_constraint(
+                        defense_selected == lpSum(self.vars_by_player[defense]),
+                        f"Select_Defense_{defense.team}"
+                    )
 
                 # Limit offensive players if the defense is selected
                 constraint_name = f"Offense_vs_Defense_{defense.team}_vs_{opposing_team}"
-                self.problem += (
-                    lpSum(self.lp_variables[(player, pos)] for player, pos in offensive_players)
-                    <= max_offense_vs_defense + (1 - defense_selected) * len(offensive_players),
+                self._add_constraint(
+                    lpSum(offensive_vars)
+                    <= max_offense_vs_defense + (1 - defense_selected) * len(offensive_vars),
                     constraint_name
                 )
             else:
@@ -197,9 +274,9 @@ class ConstraintManager:
 
     def add_single_player_constraints(self):
         for player in self.players:
-            self.problem += lpSum(
-                self.lp_variables[(player, position)] for position in player.position
-            ) <= 1, f"Single_Use_{player.name}"
+            # A single variable is already bounded by 1, so only multi-slot players need a row
+            if len(self.vars_by_player[player]) > 1:
+                self._add_constraint(lpSum(self.vars_by_player[player]) <= 1, f"Single_Use_{player.name}")
 
     def add_conditional_team_limit_with_qb(self):
         """
@@ -211,32 +288,24 @@ class ConstraintManager:
         if not self.qb_selected_vars:
             raise ValueError("QB selection variables must be created before adding conditional team limits.")
 
-        for qb, qb_selected in self.qb_selected_vars.items():
-            qb_team = qb.team
-            opponent_team = qb.opponent  # QB's opponent team
-
-            # Iterate over all teams
-            for team in set(player.team for player in self.players):
-                # Skip the QB's team and opponent team
-                if team in {qb_team, opponent_team}:
-                    continue
-
-                # Get skill position players from this team
-                non_exempt_players = [
-                    (player, pos)
-                    for player in self.players
-                    for pos in player.position
-                    if player.team == team and pos not in {"QB", "DST"}
-                ]
-
-                if non_exempt_players:
-                    # Limit players from this team unless the QB is not selected
-                    constraint_name = f"Team_Limit_{team}_With_QB_{qb.name}"
-                    self.problem += (
-                        lpSum(self.lp_variables[(player, pos)] for player, pos in non_exempt_players)
-                        <= max_non_qb_team_limit,
-                        constraint_name
-                    )
+        # The limit row for a team does not depend on which QB triggered it, so each team is
+        # added once if any QB outside its game applies the limit
+        limited_teams = {
+            team
+            for qb in (self.slate_qbs or self.qb_selected_vars)
+            for team in self.teams
+            if team not in {qb.team, qb.opponent}
+        }
+
+        for team in sorted(limited_teams):
+            # Get skill position players from this team
+            non_exempt_vars = self._team_vars(team, [pos for pos in POSITIONS if pos not in {"QB", "DST"}])
+
+            if non_exempt_vars:
+                self._add_constraint(
+                    lpSum(non_exempt_vars) <= max_non_qb_team_limit,
+                    f"Team_Limit_{team}_Non_QB",
+                )
 
 
 
@@ -245,41 +314,34 @@ class ConstraintManager:
         """
         Add all static constraints for the optimizer.
         """
-        self.add_salary_constraints()
-        self.add_position_constraints()
-        self.add_global_team_limit()
-        self.add_single_player_constraints()
+        start = time.perf_counter()
+        with instrumentation.timer("add_static_constraints"):
+            self.add_salary_constraints()
+            self.add_position_constraints()
+            self.add_global_team_limit()
+            self.add_single_player_constraints()
 
-        # Add QB-related constraints
-        self.add_qb_selection_variables()  # Create QB selection variables first
-        self.add_qb_stack_constraints()
-        self.add_qb_runback_constraints()
+            # Add QB-related constraints
+            self.add_qb_selection_variables()  # Create QB selection variables first
+            self.add_qb_stack_constraints()
+            self.add_qb_runback_constraints()
 
-        self.add_conditional_team_limit_with_qb()
-        self.add_offense_vs_defense_constraints()
+            self.add_conditional_team_limit_with_qb()
+            self.add_offense_vs_defense_constraints()
+        self.build_time = time.perf_counter() - start
+        instrumentation.count("constraint_rows", len(self.problem.constraints))
 
 
     def add_optional_constraints(self, max_ownership=None, min_fpts=None):
         '''
-        Add optional constraints such as ownership maximum and FPTS minimum. 
+        Add optional constraints such as ownership maximum and FPTS minimum.
         :param max_ownership: Maximum allowable cumulative ownership.
-        :param min_fpts: min required cumulative fpts. 
+        :param min_fpts: min required cumulative fpts.
         '''
         if max_ownership is not None:
-            lineup_ownership = lpSum(
-                player.ownership * self.lp_variables[(player, position)]
-                for player in self.players
-                for position in player.position
-            )
+            lineup_ownership = self._weighted_sum(self.pool.ownership)
             self.problem += lineup_ownership <= max_ownership, "Max_Ownership"
 
-        if min_fpts is not None: 
-            lineups_fpts = lpSum(
-                player.fpts * self.lp_variables[(player, position)]
-                for player in self.players
-                for position in player.position
-            )
+        if min_fpts is not None:
+            lineups_fpts = self._weighted_sum(self.pool.fpts)
             self.problem += lineups_fpts >= min_fpts, "Min_FPTS"
-
-
-
@@ -0,0 +1,101 @@
+import numpy as np
+from collections import defaultdict
+
+# Position correlation matrix: same-team block first, opponent block second
+POSITION_CORR = np.array([
+    [0.000, 0.056, 0.455, 0.411, -0.044, 0.271, 0.044, 0.147, 0.226, -0.424],  # QB
+    [0.056, 0.000, 0.007, 0.036, 0.050, 0.044, -0.099, 0.070, 0.142, -0.201],  # RB
+    [0.455, 0.007, 0.000, 0.030, -0.034, 0.147, 0.087, 0.127, -0.147, -0.234],  # WR
+    [0.411, 0.036, 0.030, 0.000, -0.124, 0.226, 0.069, 0.128, 0.129, -0.126],  # TE
+    [-0.044, 0.050, -0.034, -0.124, 0.000, -0.424, -0.201, -0.235, -0.126, -0.340],  # DST
+    [0.271, 0.044, 0.147, 0.226, -0.424, 0.000, 0.056, 0.456, 0.411, -0.044],  # OPPQB
+    [0.044, -0.099, 0.087, 0.069, -0.201, 0.056, 0.000, 0.008, 0.036, 0.050],  # OPPRB
+    [0.147, 0.070, 0.127, 0.128, -0.235, 0.456, 0.008, 0.000, 0.030, -0.033],  # OPPWR
+    [0.226, 0.142, -0.147, 0.129, -0.126, 0.411, 0.036, 0.030, 0.000, -0.124],  # OPPTE
+    [-0.424, -0.201, -0.234, -0.126, -0.340, -0.044, 0.050, -0.033, -0.124, 0.000],  # OPPDST
+])
+
+POSITION_TO_INDEX = {"QB": 0, "RB": 1, "WR": 2, "TE": 3, "DST": 4}
+OPP_OFFSET = 5  # Row/column offset of the OPP block in POSITION_CORR
+
+
+def group_players_by_game(players):
+    """
+    Group players by game, with the alphabetically first team's players first.
+    :param players: List of Player objects.
+    :return: Dictionary keyed by (team_a, team_b) with the list of the game's players.
+    """
+    players_by_game = defaultdict(lambda: {"team_a": [], "team_b": []})
+    for player in players:
+        if player.opponent:
+            game_key = tuple(sorted([player.team, player.opponent]))
+            if player.team == game_key[0]:
+                players_by_game[game_key]["team_a"].append(player)
+            else:
+                players_by_game[game_key]["team_b"].append(player)
+    return {
+        game_key: teams["team_a"] + teams["team_b"]
+        for game_key, teams in players_by_game.items()
+    }
+
+
+def build_game_correlation(game_players, position_corr=POSITION_CORR):
+    """
+    Build the player correlation matrix for one game from position and team index arrays,
+    repaired to be positive definite.
+    :param game_players: List of Player objects in the game.
+    :param position_corr: Position correlation matrix (same-team block, then OPP block).
+    :return: (n, n) correlation matrix.
+    """
+    num_game_players = len(game_players)
+    position_index = np.array([POSITION_TO_INDEX[player.position[0]] for player in game_players])
+    teams = np.array([player.team for player in game_players])
+
+    same_team = teams[:, None] == teams[None, :]
+    game_corr = np.where(
+        same_team,
+        position_corr[position_index[:, None], position_index[None, :]],
+        position_corr[position_index[:, None] + OPP_OFFSET, position_index[None, :] + OPP_OFFSET],
+    )
+
+    # Ensure positive semi-definiteness
+    epsilon = 1e-10
+    game_corr = (game_corr + game_corr.T) / 2
+    np.fill_diagonal(game_corr, 1.0)
+    eigvals = np.linalg.eigvalsh(game_corr)
+    if np.min(eigvals) < 0:
+        game_corr += (-np.min(eigvals) + epsilon) * np.eye(num_game_players)
+    return game_corr
+
+
+class GameCorrelationCache:
+    """
+    Per-slate cache of each game's players, projection means, randomized stddevs and
+    Cholesky factor. Built once; sampling a game is then one normal draw and one matmul.
+    """
+
+    def __init__(self, players, randomness_amount, position_corr=POSITION_CORR):
+        self.games = {}
+        for game_key, game_players in group_players_by_game(players).items():
+            self.games[game_key] = {
+                "players": game_players,
+                "mean": np.array([player.fpts for player in game_players], dtype=np.float64),
+                "stddev": np.array(
+                    [player.stddev * randomness_amount / 100 for player in game_players], dtype=np.float64
+                ),
+                "cholesky": np.linalg.cholesky(build_game_correlation(game_players, position_corr)),
+            }
+
+    def sample_game(self, game_key, correlation_adjustment, rng=None):
+        """
+        Draw one set of projections for a game.
+        :param rng: numpy Generator to draw from, e.g. one seeded from "random_seed"; an
+            unseeded Generator is used when omitted.
+        :return: (uncorrelated, correlated, adjusted) arrays aligned to the game's players.
+        """
+        game = self.games[game_key]
+        rng = np.random.default_rng() if rng is None else rng
+        uncorrelated = rng.normal(loc=game["mean"], scale=game["stddev"], size=len(game["players"]))
+        correlated = np.dot(game["cholesky"], uncorrelated)
+        adjusted = (1 - correlation_adjustment) * uncorrelated + correlation_adjustment * correlated
+        return uncorrelated, correlated, adjusted
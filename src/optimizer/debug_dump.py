@@ -0,0 +1,74 @@
+import gzip
+import os
+import shutil
+import tempfile
+
+from instrumentation import instrumentation
+
+DUMP_MODES = ("off", "first", "last", "every_n", "infeasible")
+
+
+class LpDumper:
+    """
+    Writes the optimizer's model to disk for debugging, controlled by the "lp_dump" config
+    section. Modes:
+        off         never write (default)
+        first       the stage-1 model and the first lineup model
+        last        the model of the last lineup solved
+        every_n     every Nth lineup model ("every_n" setting)
+        infeasible  only models whose solve did not end "Optimal"
+    Files are gzip-compressed LP files tagged with the iteration, written to "directory"
+    (relative paths are resolved from the project root).
+    """
+
+    def __init__(self, settings):
+        self.mode = settings.get("mode", "off")
+        if self.mode not in DUMP_MODES:
+            raise ValueError(f"Unknown lp_dump mode '{self.mode}'. Available modes: {', '.join(DUMP_MODES)}")
+        self.every_n = max(1, settings.get("every_n", 10))
+        directory = settings.get("directory", "data/output/lp_dumps")
+        project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+        self.directory = os.path.join(project_root, directory)
+
+    @property
+    def enabled(self):
+        return self.mode != "off"
+
+    def write(self, problem, tag):
+        """
+        Write a gzip-compressed LP file of the problem.
+        :return: Path of the written file.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        path = os.path.join(self.directory, f"{problem.name}_{tag}.lp.gz")
+        with instrumentation.timer("write_lp"):
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                lp_path = os.path.join(tmp_dir, "problem.lp")
+                problem.writeLP(lp_path)
+                with open(lp_path, "rb") as source, gzip.open(path, "wb") as target:
+                    shutil.copyfileobj(source, target)
+        print(f"Model written to {path}")
+        return path
+
+    def after_solve(self, problem, iteration, status):
+        """
+        Called after each solve. iteration is "stage1" for the baseline model, else the lineup index.
+        """
+        if not self.enabled:
+            return
+        if self.mode == "infeasible":
+            if status != "Optimal":
+                self.write(problem, f"{iteration}_{str(status).lower()}")
+        elif self.mode == "first":
+            if iteration in ("stage1", 0):
+                self.write(problem, iteration)
+        elif self.mode == "every_n":
+            if iteration != "stage1" and iteration % self.every_n == 0:
+                self.write(problem, iteration)
+
+    def after_run(self, problem, last_iteration):
+        """
+        Called once after the lineup loop with the index of the last lineup solved.
+        """
+        if self.mode == "last" and last_iteration is not None:
+            self.write(problem, last_iteration)
@@ -0,0 +1,179 @@
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data.player_pool import POSITIONS
+from lineups.lineups import Lineups
+from optimizer.uniqueness import UniquenessManager
+
+
+def qb_targets(qbs, config):
+    """
+    Target exposure per QB: the "target_exposure" mapping (QB name -> share) when given,
+    otherwise the QBs' projected ownership. Shares are normalized to sum to 1.
+    :param qbs: QB Player objects.
+    :param config: The loaded configuration dictionary.
+    :return: Array of shares aligned to qbs.
+    """
+    targets = config.get("qb_decomposition", {}).get("target_exposure") or {}
+    if targets:
+        weights = np.array([targets.get(qb.name, 0) for qb in qbs], dtype=np.float64)
+    else:
+        weights = np.array([qb.ownership for qb in qbs], dtype=np.float64)
+    if weights.sum() <= 0:
+        raise ValueError("QB decomposition needs a positive target exposure for at least one QB.")
+    return weights / weights.sum()
+
+
+def allocate_lineups(shares, total):
+    """
+    Split total lineups in proportion to shares, rounding by largest remainder.
+    :return: Integer array of lineup counts aligned to shares.
+    """
+    exact = shares * total
+    counts = np.floor(exact).astype(np.int64)
+    counts[np.argsort(-(exact - counts), kind="stable")[:total - counts.sum()]] += 1
+    return counts
+
+
+def team_limit_violations(lineups, config):
+    """
+    Lineups breaking the full model's team limit: more than "max_non_qb_team_limit" skill
+    players (not QB or DST) from one team.
+    :param lineups: Lineups as lists of Player objects.
+    :return: Number of violating lineups.
+    """
+    limit = config.get("max_non_qb_team_limit", 2)
+    violations = 0
+    for lineup in lineups:
+        teams = [player.team for player in lineup if player.position[0] not in {"QB", "DST"}]
+        if any(teams.count(team) > limit for team in set(teams)):
+            violations += 1
+    return violations
+
+
+def _qb_worker(site, players, qb_row, num_lineups, num_uniques, config, baseline, keep_rows):
+    """
+    Worker entry point: generate lineups with one QB fixed. The subproblem's pool is every
+    non-QB player plus that QB. It reuses the full slate's stage-1 baseline and builds its
+    team limit rows from the full slate's QBs, so it enforces the same rows as the full model.
+    :param keep_rows: Lineups this QB already has, as (player index, position) pairs;
+        num_lineups counts them.
+    :return: List of lineups as (player index, position) pairs into players.
+    """
+    from optimizer.optimizer import Optimizer
+
+    qb = players[qb_row]
+    sub_players = [player for player in players if player.position[0] != "QB" or player is qb]
+    optimizer = Optimizer(site, sub_players, num_lineups, num_uniques, config)
+    optimizer.baseline = baseline
+    optimizer.slate_qbs = [player for player in players if player.position[0] == "QB"]
+    keep = [[(players[index], position) for index, position in lineup] for lineup in keep_rows]
+    lineups = optimizer.run(keep_lineups=keep or None)
+
+    player_index = {player: i for i, player in enumerate(players)}
+    index_map = np.array([player_index[player] for player in lineups.players], dtype=np.int64)
+    return [
+        [(index, POSITIONS[pos]) for index, pos in zip(rows, positions)]
+        for rows, positions in zip(index_map[lineups.rows].tolist(), lineups.positions.tolist())
+    ]
+
+
+def generate_lineups_by_qb(optimizer):
+    """
+    QB decomposition: fix each QB in turn and solve the single-QB subproblems, whose stack
+    and runback rows no longer depend on a QB selection variable, on "num_workers"
+    processes. Lineup counts are split across QBs in proportion to their target exposure
+    (see qb_targets). Lineups closer than num_uniques players to a lineup of another QB are
+    dropped, and any shortfall (infeasible or exhausted QBs) is moved to the QBs that
+    delivered their full count, for up to "max_rounds" rounds. Settings come from
+    "qb_decomposition".
+    :param optimizer: Optimizer with its stage-1 baseline solved.
+    :return: Lineups instance.
+    """
+    settings = optimizer.config.get("qb_decomposition", {})
+    players = optimizer.players
+    num_workers = optimizer.config.get("num_workers", 1)
+    qb_rows = [row for row, player in enumerate(players) if player.position[0] == "QB"]
+    shares = qb_targets([players[row] for row in qb_rows], optimizer.config)
+    requested = dict(zip(qb_rows, allocate_lineups(shares, optimizer.num_lineups).tolist()))
+
+    seeds = [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(optimizer.config.get("random_seed")).spawn(len(qb_rows))
+    ]
+    worker_configs = {
+        row: dict(
+            optimizer.config, qb_decomposition={}, num_workers=1, random_seed=seed,
+            save_samples_path=None, load_samples_path=None,
+        )
+        for row, seed in zip(qb_rows, seeds)
+    }
+
+    accepted = {row: [] for row in qb_rows}
+    has_room = set(qb_rows)
+    start = time.perf_counter()
+    for round_index in range(settings.get("max_rounds", 3)):
+        jobs = [row for row in qb_rows if row in has_room and requested[row] > len(accepted[row])]
+        if not jobs:
+            break
+        print(f"QB decomposition round {round_index + 1}: {len(jobs)} QB subproblems on {num_workers} workers...")
+        arguments = [
+            (optimizer.site, players, row, requested[row], optimizer.num_uniques,
+             worker_configs[row], optimizer.baseline, accepted[row])
+            for row in jobs
+        ]
+        if num_workers > 1 and len(jobs) > 1:
+            with ProcessPoolExecutor(max_workers=num_workers) as executor:
+                futures = [executor.submit(_qb_worker, *args) for args in arguments]
+                results = [future.result() for future in futures]
+        else:
+            results = [_qb_worker(*args) for args in arguments]
+
+        for row, result in zip(jobs, results):
+            accepted[row] = result
+            if len(result) < requested[row]:
+                has_room.discard(row)  # Infeasible or out of unique lineups
+
+        # Lineups of different QBs can still be too similar when num_uniques > 1
+        uniqueness = UniquenessManager(players, optimizer.num_uniques)
+        for row in qb_rows:
+            unique = []
+            for lineup in accepted[row]:
+                lineup_players = [players[index] for index, _ in lineup]
+                if not uniqueness.violated(lineup_players):
+                    uniqueness.add_lineup(lineup_players)
+                    unique.append(lineup)
+            accepted[row] = unique
+
+        # Move the shortfall to the QBs that can still take more lineups
+        shortfall = optimizer.num_lineups - sum(len(lineups) for lineups in accepted.values())
+        open_rows = [row for row in qb_rows if row in has_room]
+        if shortfall <= 0 or not open_rows:
+            break
+        for row in open_rows:
+            requested[row] = max(requested[row], len(accepted[row]))
+        open_shares = np.array([shares[qb_rows.index(row)] for row in open_rows])
+        open_shares = open_shares / open_shares.sum() if open_shares.sum() > 0 else np.full(len(open_rows), 1 / len(open_rows))
+        for row, extra in zip(open_rows, allocate_lineups(open_shares, shortfall).tolist()):
+            requested[row] += extra
+
+    total = sum(len(lineups) for lineups in accepted.values())
+    print(f"QB decomposition finished in {time.perf_counter() - start:.2f} s with {total} lineups")
+    for row, share in zip(qb_rows, shares):
+        if share > 0 or accepted[row]:
+            print(f"  {players[row].name}: target {share * 100:.1f}%, actual {len(accepted[row]) / max(total, 1) * 100:.1f}%")
+    if total < optimizer.num_lineups:
+        print(f"Only {total} lineups generated by QB decomposition.")
+    violations = team_limit_violations(
+        [[players[index] for index, _ in lineup] for lineup in sum(accepted.values(), [])], optimizer.config
+    )
+    if violations:
+        print(f"Warning: {violations} QB decomposition lineups break the team limit.")
+
+    lineups = Lineups(players)
+    for row in qb_rows:
+        for lineup in accepted[row]:
+            lineups.add_lineup([(players[index], position) for index, position in lineup])
+    return lineups
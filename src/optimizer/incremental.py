@@ -0,0 +1,191 @@
+import numpy as np
+import pulp as plp
+
+from lineups.lineups import Lineups
+from lineups.result_cache import ResultCache
+from optimizer.constraints import ConstraintManager
+
+SNAPSHOT_COLUMNS = ("fpts", "ownership", "salary", "stddev")
+
+
+def diff_player_pools(previous, players):
+    """
+    Compare the current player pool with the snapshot of the previous run.
+    :param previous: Snapshot from ResultCache.load_last_run.
+    :param players: Current Player objects.
+    :return: Dictionary of "added", "removed" and "changed" player id sets.
+    """
+    previous_index = {player_id: row for row, player_id in enumerate(previous["player_ids"])}
+    current_ids = {str(player.id) for player in players}
+
+    changed = set()
+    for player in players:
+        row = previous_index.get(str(player.id))
+        if row is None:
+            continue
+        if any(not np.isclose(getattr(player, column), previous[column][row]) for column in SNAPSHOT_COLUMNS):
+            changed.add(str(player.id))
+
+    return {
+        "added": current_ids - previous_index.keys(),
+        "removed": previous_index.keys() - current_ids,
+        "changed": changed,
+    }
+
+
+def slot_assignments(lineup):
+    """
+    Every way to seat a lineup's players: late swap reorders slots after the solve, so the
+    FLEX slot can hold any of its RB/WR/TE players while the others play their primary
+    position.
+    :param lineup: List of (player, position) tuples.
+    :return: List of (player, position) lists, the lineup as stored first.
+    """
+    if not any(position == "FLEX" for _, position in lineup):
+        return [lineup]
+    return [lineup] + [
+        [(player, "FLEX" if player is flex else player.position[0]) for player, _ in lineup]
+        for flex, _ in lineup
+        if flex.position[0] in ConstraintManager.FLEX_POSITIONS
+    ]
+
+
+def model_feasible_lineups(optimizer, lineups, tolerance=1e-6):
+    """
+    Evaluate lineups against every row of the optimizer's current problem. Player
+    variables are set from a slot assignment of the lineup; the QB and DST selection
+    variables are then read off the equality rows that link them to their player's
+    variables.
+    :param optimizer: Optimizer whose problem holds the model to check against.
+    :param lineups: List of lineups as (player, position) lists.
+    :return: List with, per lineup, the first slot assignment (see slot_assignments) that
+        satisfies every row, or None if no assignment does.
+    """
+    constraints = list(optimizer.problem.constraints.values())
+    columns = {var.name: col for col, var in enumerate(optimizer.problem.variables())}
+    matrix = np.zeros((len(constraints), len(columns)), dtype=np.float64)
+    for row, constraint in enumerate(constraints):
+        for var, coefficient in constraint.items():
+            matrix[row, columns[var.name]] = coefficient
+    constants = np.array([constraint.constant for constraint in constraints], dtype=np.float64)
+    senses = np.array([constraint.sense for constraint in constraints])
+
+    # Link rows: equalities with exactly one variable that is not a player variable
+    player_columns = {columns[var.name] for var in optimizer.variables if var.name in columns}
+    links = []
+    for row in np.flatnonzero(senses == plp.LpConstraintEQ):
+        other = [col for col in np.flatnonzero(matrix[row]) if col not in player_columns]
+        if len(other) == 1:
+            links.append((row, other[0]))
+
+    candidates = [(index, assignment) for index, lineup in enumerate(lineups) for assignment in slot_assignments(lineup)]
+    values = np.zeros((len(candidates), len(columns)), dtype=np.float64)
+    invalid = np.zeros(len(candidates), dtype=bool)
+    for row, (_, assignment) in enumerate(candidates):
+        for player, position in assignment:
+            var = optimizer.lp_variables.get((player, player.position[0] if optimizer.compact else position))
+            if var is None:
+                invalid[row] = True  # The model does not offer the player this slot
+            elif var.name in columns:
+                values[row, columns[var.name]] = 1
+    for row, col in links:
+        values[:, col] = -(values @ matrix[row] + constants[row]) / matrix[row, col]
+
+    activity = values @ matrix.T + constants
+    violated = (
+        ((senses == plp.LpConstraintLE) & (activity > tolerance))
+        | ((senses == plp.LpConstraintGE) & (activity < -tolerance))
+        | ((senses == plp.LpConstraintEQ) & (np.abs(activity) > tolerance))
+    ).any(axis=1) | invalid
+
+    feasible = [None] * len(lineups)
+    for (index, assignment), bad in zip(candidates, violated):
+        if not bad and feasible[index] is None:
+            feasible[index] = assignment
+    return feasible
+
+
+def keepable_lineups(previous, players, site, config, baseline, tolerance):
+    """
+    Map the previous run's lineups onto the current pool and keep those that are still
+    feasible under the current projections and close to their previous projected score.
+    :param previous: Snapshot from ResultCache.load_last_run.
+    :param players: Current Player objects.
+    :param site: Site of the run ("dk" or "fd").
+    :param config: The loaded configuration dictionary.
+    :param baseline: Current stage-1 baseline (max_ownership, min_fpts).
+    :param tolerance: Largest allowed relative drop in a lineup's projected fpts.
+    :return: List of lineups as (player, position) lists.
+    """
+    players_by_id = {str(player.id): player for player in players}
+    previous_players = [players_by_id.get(player_id) for player_id in previous["player_ids"]]
+    min_salary, max_salary = ConstraintManager.salary_limits(site, config)
+
+    kept = []
+    for lineup in previous["lineups"]:
+        if any(previous_players[row] is None for row, _ in lineup):
+            continue  # A player left the pool
+        rows = [row for row, _ in lineup]
+        lineup_players = [previous_players[row] for row in rows]
+
+        salary = sum(player.salary for player in lineup_players)
+        ownership = sum(player.ownership for player in lineup_players)
+        fpts = sum(player.fpts for player in lineup_players)
+        previous_fpts = previous["fpts"][rows].sum()
+        if not min_salary <= salary <= max_salary:
+            continue
+        if ownership > baseline["max_ownership"] or fpts < baseline["min_fpts"]:
+            continue
+        if fpts < (1 - tolerance) * previous_fpts:
+            continue
+        kept.append([(previous_players[row], position) for row, position in lineup])
+    return kept
+
+
+def reoptimize(optimizer, previous):
+    """
+    Re-run the optimizer after a projection update, keeping the previous lineups that are
+    still feasible and near-optimal and only solving for the lineups that must change.
+    Falls back to a full run when there is no previous run.
+    :param optimizer: Optimizer over the current player pool.
+    :param previous: Snapshot from ResultCache.load_last_run, or None.
+    :return: Lineups instance.
+    """
+    if previous is None:
+        print("No previous run found, running a full optimization.")
+        return optimizer.run()
+
+    diff = diff_player_pools(previous, optimizer.players)
+    print(
+        f"Player pool changes since the last run: {len(diff['added'])} added, "
+        f"{len(diff['removed'])} removed, {len(diff['changed'])} changed"
+    )
+
+    # Same pool and config, same stage-1 solution; older snapshots of parallel runs have no
+    # baseline and older snapshots have no config hash
+    same_config = previous.get("config_hash") == ResultCache.config_hash(optimizer.config)
+    if not any(diff.values()) and same_config and previous["baseline"] is not None:
+        optimizer.baseline = previous["baseline"]
+    elif not optimizer.solve_baseline():
+        return Lineups()
+
+    tolerance = optimizer.config.get("incremental_tolerance", 0.02)
+    kept = keepable_lineups(
+        previous, optimizer.players, optimizer.site, optimizer.config, optimizer.baseline, tolerance
+    )
+
+    # Stack, runback, team and position rows can change with the config, so every kept
+    # lineup is checked against the full current model before it is carried over
+    optimizer.build_problem(
+        "NFL_DFS_Incremental_Check", optimizer.baseline["max_ownership"], optimizer.baseline["min_fpts"]
+    )
+    feasible = model_feasible_lineups(optimizer, kept)
+    dropped = sum(assignment is None for assignment in feasible)
+    if dropped:
+        print(f"Dropping {dropped} previous lineups that break the current model")
+    kept = [assignment for assignment in feasible if assignment is not None][:optimizer.num_lineups]
+    print(
+        f"Keeping {len(kept)}/{len(previous['lineups'])} previous lineups, "
+        f"re-solving {optimizer.num_lineups - len(kept)}"
+    )
+    return optimizer.run(keep_lineups=kept)
@@ -0,0 +1,147 @@
+import csv
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pulp as plp
+
+from data.data_manager import ENTRY_SLOTS
+from optimizer.optimizer import Optimizer
+from optimizer.sampler import ProjectionSampler
+
+
+class LateSwapOptimizer:
+    """
+    Re-optimizes the unlocked slots of DK entries. The model is built once; players whose
+    games have started are excluded through their variable bounds, and each entry only
+    fixes its own locked players (lower bound 1 on their slot variable) and swaps the
+    objective before solving.
+    """
+
+    def __init__(self, site, players, config, locked_ids):
+        # Locked players are fixed by slot, which needs the full (player, slot) model
+        self.optimizer = Optimizer(site, players, 0, 0, dict(config, compact_model=False, neighborhood_pool={}, qb_decomposition={}))
+        self.optimizer.build_problem("NFL_DFS_Late_Swap")
+        self.players_by_id = {str(player.id): player for player in players}
+        self.lp_variables = self.optimizer.lp_variables
+
+        # Players whose games have started can only stay in entries that already have them
+        for (player, _), var in self.lp_variables.items():
+            if str(player.id) in locked_ids:
+                var.upBound = 0
+
+    def swap(self, entry, projections):
+        """
+        Re-optimize one entry.
+        :param entry: Entry dictionary from DataManager.iter_player_lineups.
+        :param projections: Projection per player, aligned to the players list.
+        :return: (slot-ordered player ids, status). The original ids are returned unless
+            the status is "Optimal".
+        """
+        fixed = {}
+        for slot_index, (slot, player_id, locked) in enumerate(zip(ENTRY_SLOTS, entry["player_ids"], entry["locked"])):
+            if not locked:
+                continue
+            player = self.players_by_id.get(player_id)
+            if player is None or slot not in player.position:
+                return entry["player_ids"], "Locked player not in pool"
+            fixed[(player, slot)] = slot_index
+        if len(fixed) == len(ENTRY_SLOTS):
+            return entry["player_ids"], "Fully locked"
+
+        fixed_vars = [self.lp_variables[key] for key in fixed]
+        original_bounds = [(var, var.lowBound, var.upBound) for var in fixed_vars]
+        for var in fixed_vars:
+            var.lowBound = var.upBound = 1
+        try:
+            self.optimizer.set_objective(projections[self.optimizer.variable_players])
+            status = self.optimizer.solve()
+        except plp.PulpSolverError:
+            status = "Error"
+        finally:
+            for var, low, up in original_bounds:
+                var.lowBound, var.upBound = low, up
+        if status != "Optimal":
+            return entry["player_ids"], status
+
+        # Locked players keep their slot; swapped-in players take the open slots of their position
+        slots = [None] * len(ENTRY_SLOTS)
+        for slot_index in fixed.values():
+            slots[slot_index] = entry["player_ids"][slot_index]
+        for player, position in self.optimizer.selected_keys():
+            if (player, position) in fixed:
+                continue
+            slot_index = next(
+                i for i, slot in enumerate(ENTRY_SLOTS) if slot == position and slots[i] is None
+            )
+            slots[slot_index] = str(player.id)
+        return slots, status
+
+
+def _late_swap_worker(site, players, config, entries, locked_ids, seed):
+    """
+    Worker entry point: build one late swap model and re-optimize a batch of entries.
+    :return: List of (slot-ordered player ids, status) per entry.
+    """
+    late_swap = LateSwapOptimizer(site, players, config, locked_ids)
+    sampler = ProjectionSampler(
+        players, config["randomness_amount"], config.get("correlation_adjustment", 0.0), seed=seed
+    )
+    projections = sampler.sample(len(entries))
+    return [late_swap.swap(entry, row) for entry, row in zip(entries, projections)]
+
+
+def late_swap_entries(site, players, config, entries, locked_ids):
+    """
+    Re-optimize entries in batches of "late_swap_batch_size", spread over "num_workers"
+    processes. Each batch draws its projections from its own RNG stream spawned from
+    "random_seed".
+    :param entries: Entry dictionaries from DataManager.iter_player_lineups.
+    :param locked_ids: IDs of the players whose games have started.
+    :return: List of (slot-ordered player ids, status), aligned with entries.
+    """
+    batch_size = max(1, config.get("late_swap_batch_size", 100))
+    num_workers = config.get("num_workers", 1)
+    batches = [entries[start:start + batch_size] for start in range(0, len(entries), batch_size)]
+    seeds = [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(config.get("random_seed")).spawn(len(batches))
+    ]
+
+    print(f"Late swapping {len(entries)} entries in {len(batches)} batches on {num_workers} workers...")
+    start = time.perf_counter()
+    if num_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_workers) as executor:
+            futures = [
+                executor.submit(_late_swap_worker, site, players, config, batch, locked_ids, seed)
+                for batch, seed in zip(batches, seeds)
+            ]
+            results = [result for future in futures for result in future.result()]
+    else:
+        results = [
+            result
+            for batch, seed in zip(batches, seeds)
+            for result in _late_swap_worker(site, players, config, batch, locked_ids, seed)
+        ]
+
+    statuses = {}
+    for _, status in results:
+        statuses[status] = statuses.get(status, 0) + 1
+    print(f"Late swap finished in {time.perf_counter() - start:.2f} s: {statuses}")
+    return results
+
+
+def export_late_swap(path, entries, results):
+    """
+    Write the swapped entries in DK's entry upload format.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["Entry ID", "Contest Name", "Contest ID", "Entry Fee", *ENTRY_SLOTS])
+        for entry, (player_ids, _) in zip(entries, results):
+            writer.writerow(
+                [entry["entry_id"], entry["contest_name"], entry["contest_id"], entry["entry_fee"], *player_ids]
+            )
+    print(f"Late swap lineups written to {path}")
@@ -0,0 +1,271 @@
+import heapq
+import math
+import time
+
+import numpy as np
+import pulp as plp
+
+from instrumentation import instrumentation
+from lineups.lineups import Lineups
+from optimizer.parallel import reconcile_lineups
+
+
+class NeighborhoodPool:
+    """
+    Local-search pool of good lineups around a solved lineup of the compact model: not a
+    solver solution pool, and not guaranteed to hold the K best lineups. The model's
+    rows are copied into a dense (rows x players) matrix once; a lineup's neighbors are
+    the lineups one or two player swaps away, ranked by objective and checked against
+    every row at once through their row activities, so each pool member satisfies the
+    same constraints the solver enforces (including the stage-1 ownership/fpts rows).
+    """
+
+    def __init__(self, optimizer, chunk_size=8192, screen_size=8, tolerance=1e-6):
+        """
+        :param optimizer: Optimizer whose current problem holds the compact model.
+        """
+        columns = {var: col for col, var in enumerate(optimizer.variables)}
+        if any(var not in columns for var in optimizer.problem.variables()):
+            raise ValueError("The neighborhood pool needs the compact model (one variable per player).")
+
+        constraints = list(optimizer.problem.constraints.values())
+        # The extra all-zero column stands for "no player" so single swaps share the pair arrays
+        self.matrix = np.zeros((len(constraints), len(columns) + 1), dtype=np.float64)
+        self.lower = np.empty(len(constraints), dtype=np.float64)
+        self.upper = np.empty(len(constraints), dtype=np.float64)
+        for row, constraint in enumerate(constraints):
+            for var, coefficient in constraint.items():
+                self.matrix[row, columns[var]] = coefficient
+            rhs = -constraint.constant
+            self.lower[row] = rhs if constraint.sense in (plp.LpConstraintGE, plp.LpConstraintEQ) else -np.inf
+            self.upper[row] = rhs if constraint.sense in (plp.LpConstraintLE, plp.LpConstraintEQ) else np.inf
+        self.num_columns = len(columns)
+        self.chunk_size = chunk_size
+        self.screen_size = screen_size
+        self.tolerance = tolerance
+        # Swaps rejected per row; the most rejecting rows screen candidates before the full check
+        self.rejections = np.zeros(len(constraints), dtype=np.int64)
+
+    def _activity(self, rows, base, out_first, out_second, in_first, in_second):
+        matrix = self.matrix[rows]
+        return base[rows] - matrix[:, out_first] - matrix[:, out_second] + matrix[:, in_first] + matrix[:, in_second]
+
+    def _violated(self, rows, activity):
+        return (activity < self.lower[rows, None] - self.tolerance) | (activity > self.upper[rows, None] + self.tolerance)
+
+    def _swaps(self, columns, coefficients, threshold):
+        """
+        The one- and two-player swaps of a lineup whose objective beats threshold. Swap
+        values are computed as a (removed sets x added sets) matrix, and index arrays are
+        only built for the swaps above the threshold.
+        :return: (removed, removed, added, added, objective change) arrays; num_columns
+            marks the unused entry of a single swap.
+        """
+        none = self.num_columns
+        values = np.append(coefficients, 0.0)
+        base_value = values[columns].sum()
+        selected = np.zeros(self.num_columns, dtype=bool)
+        selected[columns] = True
+        free = np.flatnonzero(~selected)
+
+        out_first, out_second = np.triu_indices(len(columns), k=1)
+        in_first, in_second = np.triu_indices(len(free), k=1)
+        blocks = (
+            (np.column_stack([columns, np.full(len(columns), none)]), np.column_stack([free, np.full(len(free), none)])),
+            (np.column_stack([columns[out_first], columns[out_second]]), np.column_stack([free[in_first], free[in_second]])),
+        )
+        parts = []
+        for removed, added in blocks:
+            delta = values[added].sum(axis=1)[None, :] - values[removed].sum(axis=1)[:, None]
+            rows, cols = np.nonzero(base_value + delta > threshold)
+            parts.append((removed[rows, 0], removed[rows, 1], added[cols, 0], added[cols, 1], delta[rows, cols]))
+        return tuple(np.concatenate(arrays) for arrays in zip(*parts))
+
+    def neighbors(self, columns, coefficients, limit, threshold=-np.inf):
+        """
+        The best feasible lineups one or two swaps away from a lineup.
+        :param columns: Sorted column indices of the lineup.
+        :param coefficients: Objective coefficient per column.
+        :param limit: Maximum number of neighbors to return.
+        :param threshold: Only neighbors with a higher objective are considered.
+        :return: List of (objective, sorted column array), best first.
+        """
+        out_first, out_second, in_first, in_second, delta = self._swaps(columns, coefficients, threshold)
+        base_value = coefficients[columns].sum()
+        order = np.argsort(-delta, kind="stable")
+
+        base = self.matrix[:, columns].sum(axis=1)[:, None]
+        all_rows = np.arange(len(self.matrix))
+        found = []
+        for start in range(0, len(order), self.chunk_size):
+            chunk = order[start:start + self.chunk_size]
+            screen = np.argsort(-self.rejections, kind="stable")[:self.screen_size]
+            screened = self._violated(screen, self._activity(
+                screen, base, out_first[chunk], out_second[chunk], in_first[chunk], in_second[chunk]
+            ))
+            chunk = chunk[~screened.any(axis=0)]
+            violated = self._violated(all_rows, self._activity(
+                all_rows, base, out_first[chunk], out_second[chunk], in_first[chunk], in_second[chunk]
+            ))
+            self.rejections += violated.sum(axis=1)
+            feasible = chunk[~violated.any(axis=0)]
+            found.extend(feasible[:limit - len(found)].tolist())
+            if len(found) >= limit:
+                break
+
+        result = []
+        for swap in found:
+            kept = columns[(columns != out_first[swap]) & (columns != out_second[swap])]
+            added = [col for col in (in_first[swap], in_second[swap]) if col != self.num_columns]
+            result.append((base_value + delta[swap], np.sort(np.concatenate([kept, added]))))
+        return result
+
+    def best_lineups(self, columns, coefficients, size, max_expansions=None):
+        """
+        Best-first pool around a solved lineup: starting from the lineup itself, repeatedly
+        expand the best lineup not yet expanded, until no unexpanded lineup can still make
+        the best size or max_expansions (default size) lineups have been expanded. Lineups
+        only reachable through a chain of worse lineups can be missed, so the pool is a
+        close approximation of the k best, not an exact ranking.
+        :param columns: Column indices of the solver's optimal lineup.
+        :param coefficients: Objective coefficient per column.
+        :param size: Number of lineups wanted.
+        :param max_expansions: Cap on the number of lineups expanded.
+        :return: List of sorted column arrays, best first.
+        """
+        max_expansions = size if max_expansions is None else max_expansions
+        columns = np.sort(np.asarray(columns))
+        pool = {tuple(columns.tolist()): (coefficients[columns].sum(), columns)}
+        frontier = [(-pool[tuple(columns.tolist())][0], tuple(columns.tolist()))]
+        kept = [pool[frontier[0][1]][0]]  # Min-heap of the best size objective values
+        expansions = 0
+        while frontier and expansions < max_expansions:
+            negative_value, key = heapq.heappop(frontier)
+            if len(kept) >= size and -negative_value < kept[0]:
+                break  # Nothing left to expand can reach the pool
+            expansions += 1
+            threshold = kept[0] if len(kept) >= size else -np.inf
+            for value, neighbor in self.neighbors(pool[key][1], coefficients, size, threshold):
+                neighbor_key = tuple(neighbor.tolist())
+                if neighbor_key not in pool:
+                    pool[neighbor_key] = (value, neighbor)
+                    heapq.heappush(frontier, (-value, neighbor_key))
+                    if len(kept) < size:
+                        heapq.heappush(kept, value)
+                    elif value > kept[0]:
+                        heapq.heapreplace(kept, value)
+        ranked = sorted(pool.values(), key=lambda item: -item[0])
+        return [lineup for _, lineup in ranked[:size]]
+
+
+def _solve_columns(optimizer, coefficients):
+    """
+    Solve one objective.
+    :return: Column indices of the optimal lineup, or None if the solve did not end "Optimal".
+    """
+    optimizer.set_objective(coefficients)
+    try:
+        status = optimizer.solve()
+    except plp.PulpSolverError:
+        status = "Error"
+    if status != "Optimal":
+        print(f"Neighborhood pool solve ended {status}.")
+        return None
+    return np.flatnonzero(np.array([var.varValue for var in optimizer.variables]) > 0.5)
+
+
+def generate_lineups_neighborhood(optimizer):
+    """
+    Neighborhood pool mode: each solve returns a pool of up to "pool_size" good lineups
+    found by swapping players around the solver's lineup (NeighborhoodPool), an
+    approximation of its K best, instead of a single lineup, so a set needs about
+    num_lineups * "oversample" / "pool_size" solves, one per sampled objective. The merged
+    pools are reduced to num_lineups with reconcile_lineups, which ranks each lineup by the
+    best objective it reached in a pool and enforces num_uniques and the exposure
+    penalties; if that leaves the set short (large num_uniques), another
+    batch of objectives is solved. With "sample_free" a single solve on the plain
+    projections feeds one pool, which is doubled until the set is full or it reaches
+    "max_pool_size". "max_expansions" caps the work per pool (see
+    NeighborhoodPool.best_lineups). Settings come from "neighborhood_pool".
+    :param optimizer: Optimizer with its stage-1 baseline solved.
+    :return: Lineups instance.
+    """
+    settings = optimizer.config.get("neighborhood_pool", {})
+    pool_size = max(1, settings.get("pool_size", 50))
+    target = math.ceil(optimizer.num_lineups * settings.get("oversample", 1.25))
+    if not optimizer.compact:
+        raise ValueError("Neighborhood pool mode needs the compact DK model.")
+
+    optimizer.build_problem(
+        "NFL_DFS_Neighborhood_Pool", optimizer.baseline["max_ownership"], optimizer.baseline["min_fpts"]
+    )
+    neighborhood_pool = NeighborhoodPool(optimizer)
+    keys = list(optimizer.lp_variables)
+    penalty_weights = optimizer.config.get("exposure_penalty_weights", {})
+    candidates = []
+    scores = []  # Best objective value each candidate reached in a pool
+    seen = {}
+
+    def add_pool(solution, coefficients, size):
+        with instrumentation.timer("neighborhood_pool"):
+            pool = neighborhood_pool.best_lineups(solution, coefficients, size, settings.get("max_expansions"))
+        for columns in pool:
+            key = tuple(columns.tolist())
+            value = float(coefficients[columns].sum())
+            if key not in seen:
+                seen[key] = len(candidates)
+                candidates.append(columns)
+                scores.append(value)
+            else:
+                scores[seen[key]] = max(scores[seen[key]], value)
+        return len(pool)
+
+    def reconcile():
+        return reconcile_lineups(
+            [[(optimizer.variable_players[col], keys[col][1]) for col in columns] for columns in candidates],
+            scores, optimizer.players, optimizer.num_lineups, optimizer.num_uniques, penalty_weights,
+        )
+
+    start = time.perf_counter()
+    selected = []
+    solves = 0
+    if settings.get("sample_free", False):
+        fpts = np.array([player.fpts for player in optimizer.players], dtype=np.float64)
+        coefficients = fpts[optimizer.variable_players] / max(fpts.max(), 1e-9)
+        pool_size = target
+        max_pool_size = settings.get("max_pool_size", 5000)
+        solution = _solve_columns(optimizer, coefficients)
+        solves = 1
+        while solution is not None:
+            found = add_pool(solution, coefficients, pool_size)
+            selected = reconcile()
+            if len(selected) >= optimizer.num_lineups or pool_size >= max_pool_size or found < pool_size:
+                break
+            pool_size = min(2 * pool_size, max_pool_size)
+    else:
+        samples = optimizer.sample_projections()
+        objectives = samples / samples.max(axis=1, keepdims=True)
+        batch_size = math.ceil(target / pool_size)
+        failed = False
+        while not failed and solves < len(objectives) and len(selected) < optimizer.num_lineups:
+            for objective in objectives[solves:solves + batch_size]:
+                solves += 1
+                coefficients = objective[optimizer.variable_players]
+                solution = _solve_columns(optimizer, coefficients)
+                if solution is None:
+                    failed = True
+                    break
+                add_pool(solution, coefficients, pool_size)
+            selected = reconcile()
+
+    print(
+        f"Neighborhood pool: {solves} solves with pools of up to {pool_size} lineups gave {len(candidates)} distinct "
+        f"lineups in {time.perf_counter() - start:.2f} s"
+    )
+    if len(selected) < optimizer.num_lineups:
+        print(f"Only {len(selected)} unique lineups after reconciliation of {len(candidates)} candidates.")
+
+    lineups = Lineups(optimizer.players)
+    for row in selected:
+        lineups.add_lineup(optimizer.assign_flex([keys[col] for col in candidates[row]]))
+    return lineups
@@ -1,9 +1,19 @@
 from pulp import LpProblem, LpMaximize, lpSum
 from optimizer.constraints import ConstraintManager
+from optimizer.solvers import get_solver_backend
+from optimizer.sampler import ProjectionSampler
+from optimizer.parallel import generate_lineups_parallel
+from optimizer.neighborhood_pool import generate_lineups_neighborhood
+from optimizer.decomposition import generate_lineups_by_qb
+from optimizer.uniqueness import UniquenessManager
+from optimizer.debug_dump import LpDumper
+from instrumentation import instrumentation
 import numpy as np
 from lineups.lineups import Lineups
+from data.data_manager import ENTRY_SLOTS
+from data.player_pool import POSITIONS
 import pulp as plp
-from collections import defaultdict
+import time
 
 
 
@@ -16,279 +26,404 @@ class Optimizer:
         self.config = config
         self.problem = LpProblem("NFL_DFS_Optimization", LpMaximize)
         self.lp_variables = {}
-        self.player_exposure = {player: 0 for player in players}  # Initialize exposure tracker
+        self.iteration_timings = []  # Per-lineup build/solve timings in seconds
+        self.baseline = None  # Stage-1 baseline and the limits derived from it
+        self.slate_qbs = None  # Full-slate QBs for the team limit rows of a single-QB subproblem
+        self.solver = get_solver_backend(config)
+        self.lp_dumper = LpDumper(config.get("lp_dump", {}))
+
+        # Per-player lookups for ordering rosters for late swap
+        self.player_index = {player: i for i, player in enumerate(players)}
+        self.primary_position = np.array([POSITIONS.index(player.position[0]) for player in players], dtype=np.int8)
+        gametimes = sorted({player.gametime for player in players if player.gametime is not None})
+        gametime_rank = {gametime: rank for rank, gametime in enumerate(gametimes)}
+        self.gametime_rank = np.array(
+            [gametime_rank.get(player.gametime, -1) for player in players], dtype=np.int64
+        )
 
-        self.position_map = {i: ["G", "F", "C", "UTIL"] for i in range(len(players))}
+        # The compact model has one binary per player (keyed by its primary position) and
+        # assigns the FLEX slot after the solve; DK only, FanDuel keeps the full model.
+        # Neighborhood pool mode swaps players column by column, so it needs the compact model.
+        self.neighborhood_pool = config.get("neighborhood_pool", {}).get("enabled", False)
+        self.compact = config.get("compact_model", False) and site == "dk"
+        if self.neighborhood_pool and not self.compact:
+            raise ValueError(
+                'Neighborhood pool mode needs the compact DK model; set "compact_model": true.'
+            )
 
         # Create LP variables for each player and position
+        self.player_variables = {}
         for player in players:
-            for position in player.position:
+            positions = player.position[:1] if self.compact else player.position
+            for position in positions:
                 var_name = f"{player.name}_{position}_{player.id}"
                 self.lp_variables[(player, position)] = plp.LpVariable(
                     name=var_name, cat=plp.LpBinary
                 )
+            self.player_variables[player] = [self.lp_variables[(player, position)] for position in positions]
 
-    def adjust_roster_for_late_swap(self, lineup):
+        # Fixed variable order for objectives given as coefficient vectors
+        self.variables = list(self.lp_variables.values())
+        self.variable_players = np.array(
+            [self.player_index[player] for player, _ in self.lp_variables], dtype=np.int64
+        )
+
+    def adjust_roster_for_late_swap(self, lineups):
+        """
+        Order every lineup for late swap. The FLEX slot goes to the latest-kickoff player
+        among the FLEX player and the primary slots of the FLEX player's position, which keeps
+        the most swap options open. Runs once over the whole lineup pool after generation.
+        :param lineups: Lineups instance, rewritten in DK slot order in place.
+        :return: The same Lineups instance.
         """
-        Adjusts a roster to optimize for late swap.
-        Ensures players with later game times are positioned in flex spots when possible.
+        if self.site == "fd" or not len(lineups):
+            return lineups  # No late swap needed for FanDuel
+
+        lineups.sort_slots()
+        rows = lineups.rows.copy()
+        dk_slots = np.array([POSITIONS.index(slot) for slot in ENTRY_SLOTS])
+        valid = (lineups.positions == dk_slots).all(axis=1)
+
+        # Look up the precomputed per-player arrays through the optimizer's player order
+        index_map = np.array([self.player_index[player] for player in lineups.players], dtype=np.int64)
+        flex = ENTRY_SLOTS.index("FLEX")
+        primary = self.primary_position[index_map[rows]]
+        eligible = primary == primary[:, [flex]]
+        # Prefer the later kickoff; on a tie the current FLEX player stays
+        score = np.where(eligible, 2 * self.gametime_rank[index_map[rows]] + (np.arange(len(ENTRY_SLOTS)) == flex), -1)
+        best = np.where(valid, score.argmax(axis=1), flex)
+        lineup_index = np.arange(len(rows))
+        rows[lineup_index, flex], rows[lineup_index, best] = rows[lineup_index, best], rows[lineup_index, flex]
+
+        lineups.set_arrays(rows, lineups.positions)
+        return lineups
 
-        :param lineup: List of tuples (player, position) representing the lineup.
-        :return: Adjusted lineup.
+    def build_problem(self, name, max_ownership=None, min_fpts=None):
         """
-        if self.site == "fd":
-            return lineup  # No late swap needed for FanDuel
-
-        sorted_lineup = list(lineup)
-
-        # Swap players in primary and flex positions based on game time
-        def swap_if_needed(primary_pos, flex_pos):
-            primary_player, primary_position = sorted_lineup[primary_pos]
-            flex_player, flex_position = sorted_lineup[flex_pos]
-
-            # Check if the primary player's game time is later than the flex player's
-            if (
-                primary_player.gametime > flex_player.gametime
-            ):
-                primary_positions = self.position_map[primary_pos]
-                flex_positions = self.position_map[flex_pos]
-
-                # Ensure both players are eligible for position swaps
-                if any(
-                    pos in primary_positions
-                    for pos in flex_player.position
-                ) and any(
-                    pos in flex_positions
-                    for pos in primary_player.position
-                ):
-                    # Perform the swap
-                    sorted_lineup[primary_pos], sorted_lineup[flex_pos] = (
-                        sorted_lineup[flex_pos],
-                        sorted_lineup[primary_pos],
-                    )
-
-        # Iterate over positions to check and apply swaps
-        for primary_pos in range(len(sorted_lineup)):
-            for flex_pos in range(primary_pos + 1, len(sorted_lineup)):
-                swap_if_needed(primary_pos, flex_pos)
-
-        return sorted_lineup
-
-
-    def run(self):
+        Create a fresh LP problem with the static constraints, plus the optional
+        ownership/fpts constraints when limits are supplied.
+        :param name: Name of the LP problem.
+        :param max_ownership: Maximum allowable cumulative ownership.
+        :param min_fpts: Min required cumulative fpts.
+        :return: The ConstraintManager bound to the new problem.
         """
-        Run the optimization process with scaled metrics and penalized exposure.
-        :return: Lineups instance containing optimized lineups.
+        with instrumentation.timer("build_problem"):
+            self.problem = LpProblem(name, LpMaximize)
+
+            constraint_manager = ConstraintManager(
+                self.site, self.problem, self.players, self.lp_variables, self.config, compact=self.compact,
+                slate_qbs=self.slate_qbs,
+            )
+            constraint_manager.add_static_constraints()
+        if max_ownership is not None or min_fpts is not None:
+            with instrumentation.timer("add_optional_constraints"):
+                constraint_manager.add_optional_constraints(max_ownership, min_fpts)
+        return constraint_manager
+
+    def print_timing_summary(self):
         """
-        lineups = Lineups()  # Object to store all generated lineups
-        exclusion_constraints = []  # List to store uniqueness constraints
+        Print build and solve time per lineup, comparing the first and last tenth of
+        the run so growth in per-lineup cost is easy to spot.
+        """
+        if not self.iteration_timings:
+            return
+        build_ms = np.array([t["build"] for t in self.iteration_timings]) * 1000
+        solve_ms = np.array([t["solve"] for t in self.iteration_timings]) * 1000
+        window = max(1, len(build_ms) // 10)
+        print(
+            f"Timing over {len(build_ms)} lineups: "
+            f"build avg {build_ms.mean():.1f} ms (first {build_ms[:window].mean():.1f}, last {build_ms[-window:].mean():.1f}), "
+            f"solve avg {solve_ms.mean():.1f} ms (first {solve_ms[:window].mean():.1f}, last {solve_ms[-window:].mean():.1f})"
+        )
 
-        players_by_game = defaultdict(lambda: {"team_a": [], "team_b": []})
-        for player in self.players:
-            if player.opponent:
-                game_key = tuple(sorted([player.team, player.opponent]))
-                if player.team == game_key[0]:
-                    players_by_game[game_key]["team_a"].append(player)
-                else:
-                    players_by_game[game_key]["team_b"].append(player)
+    def set_objective(self, coefficients):
+        """
+        Set the objective from one coefficient per variable, in self.variables order.
+        Backends that take the vector directly skip the PuLP expression unless LP dumps need it.
+        :param coefficients: NumPy array aligned to self.variables.
+        """
+        self.solver.set_objective(self.problem, self.variables, coefficients)
+        if self.lp_dumper.enabled and not self.solver.sets_problem_objective:
+            self.problem.setObjective(plp.LpAffineExpression(zip(self.variables, coefficients.tolist())))
 
-        # initialize exposure tracker
-        exposure_tracker = {player: 0 for player in self.players}
-        # Weights for each component in the objective function
-        ownership_buffer = self.config.get("ownership_buffer", 0.05)
-        exposure_penalty_weights = self.config.get("exposure_penalty_weights", {})
-        correlation_adjustment = self.config.get("correlation_adjustment", 0.0)
-        fpts_buffer = self.config.get("fpts_buffer", 0.95)
+    def solve(self):
+        """
+        Solve the current problem with the configured backend.
+        :return: PuLP status string.
+        """
+        with instrumentation.timer("solve"):
+            status = self.solver.solve(self.problem)
+        instrumentation.count("solves")
+        return status
 
-        self.problem = LpProblem(f"NFL_DFS_Optimization", LpMaximize)
+    def selected_keys(self):
+        """
+        (player, position) keys of the variables set in the last solution. In the compact
+        model the player beyond its position's primary slots is assigned to FLEX.
+        """
+        with instrumentation.timer("extract_solution"):
+            keys = [key for key, var in self.lp_variables.items() if var.varValue == 1]
+            if self.compact:
+                keys = self.assign_flex(keys)
+            return keys
+
+    @staticmethod
+    def assign_flex(keys):
+        """
+        Move the last RB/WR/TE past its position's primary slot count into FLEX.
+        :param keys: (player, primary position) keys of a compact-model lineup.
+        :return: (player, slot) keys; unchanged if no position is over its slot count.
+        """
+        primary_slots = {position: ENTRY_SLOTS.count(position) for position in ConstraintManager.FLEX_POSITIONS}
+        counts = {}
+        for index, (player, position) in enumerate(keys):
+            counts[position] = counts.get(position, 0) + 1
+            if position in primary_slots and counts[position] > primary_slots[position]:
+                keys = list(keys)
+                keys[index] = (player, "FLEX")
+                break
+        return keys
+
+    def uniqueness_cut(self, lineup_players):
+        """
+        Constraint keeping future lineups at least num_uniques players away from a lineup.
+        :param lineup_players: Players in the lineup to move away from.
+        """
+        return lpSum(
+            var for player in lineup_players for var in self.player_variables[player]
+        ) <= len(lineup_players) - self.num_uniques
 
-        # Reinitialize constraints for the new problem
-        constraint_manager = ConstraintManager(
-            self.site, self.problem, self.players, self.lp_variables, self.config
+    def sample_projections(self):
+        """
+        Draw the randomized projections for every lineup up front, or replay a saved set
+        when "load_samples_path" is configured.
+        :return: (num_lineups, num_players) array aligned to self.players.
+        """
+        sampler = ProjectionSampler(
+            self.players,
+            self.config["randomness_amount"],
+            self.config.get("correlation_adjustment", 0.0),
+            seed=self.config.get("random_seed"),
         )
 
-        constraint_manager.add_static_constraints()  # Add static constraints
+        load_path = self.config.get("load_samples_path")
+        if load_path:
+            samples = sampler.load(load_path, self.num_lineups)
+            print(f"Replaying projection samples from {load_path}")
+        else:
+            with instrumentation.timer("sample_projections"):
+                samples = sampler.sample(self.num_lineups)
+
+        save_path = self.config.get("save_samples_path")
+        if save_path:
+            ProjectionSampler.save(save_path, samples)
+        return samples
+
+    def solve_baseline(self):
+        """
+        Stage 1: solve for the projection-optimal lineup and derive the ownership limit and
+        fpts minimum for the lineup loop. Stores them on self.baseline.
+        :return: True if stage 1 solved to optimality.
+        """
+        ownership_buffer = self.config.get("ownership_buffer", 0.05)
+        fpts_buffer = self.config.get("fpts_buffer", 0.95)
+
+        constraint_manager = self.build_problem("NFL_DFS_Optimization")
+        print(f"Model size: {constraint_manager.model_size()}")
 
         self.problem.setObjective(
-            lpSum(
-                player.fpts * self.lp_variables[(player, position)]
-                for player in self.players
-                for position in player.position
-            )
+            lpSum(player.fpts * var for (player, _), var in self.lp_variables.items())
         )
 
-        self.problem.writeLP("problem_stage1.lp")
-
         try:
-            self.problem.solve(plp.PULP_CBC_CMD(msg=False))
+            status = self.solve()
         except plp.PulpSolverError:
             print("Infeasibility during Stage 1 optimization.")
-            return lineups
-        
-        if plp.LpStatus[self.problem.status] != "Optimal":
+            self.lp_dumper.after_solve(self.problem, "stage1", "Error")
+            return False
+        self.lp_dumper.after_solve(self.problem, "stage1", status)
+
+        if status != "Optimal":
             print("No optimal solution found during Stage 1 optimization")
-            return lineups
+            return False
         
-        final_vars = [
-            key for key, var in self.lp_variables.items() if var.varValue == 1
-        ]
-        final_lineup = [(player, position) for player, position in final_vars]
+        final_lineup = self.selected_keys()
 
         baseline_fpts = sum(player.fpts for player, _ in final_lineup)
         baseline_ownership = sum(player.ownership for player, _ in final_lineup)
         max_ownership = (1-ownership_buffer) * baseline_ownership
         min_fpts = fpts_buffer * baseline_fpts
 
+        self.baseline = {
+            "fpts": float(baseline_fpts),
+            "ownership": float(baseline_ownership),
+            "max_ownership": float(max_ownership),
+            "min_fpts": float(min_fpts),
+        }
         print(f"Baseline FPTS: {baseline_fpts}, min_fpts: {min_fpts}, baseline ownership: {baseline_ownership}, ownership limit: {max_ownership}")
+        return True
 
+    def run(self, keep_lineups=None):
+        """
+        Run the optimization process with scaled metrics and penalized exposure.
+        :param keep_lineups: Lineups (lists of (player, position)) to carry over; only the
+            remaining num_lineups - len(keep_lineups) are generated.
+        :return: Lineups instance containing optimized lineups.
+        """
+        # QB decomposition: one subproblem per QB, split by target QB exposure
+        if self.config.get("qb_decomposition", {}).get("enabled", False) and not keep_lineups:
+            if self.baseline is None and not self.solve_baseline():
+                return Lineups(self.players)
+            lineups = generate_lineups_by_qb(self)
+            with instrumentation.timer("late_swap_order"):
+                self.adjust_roster_for_late_swap(lineups)
+            return lineups
 
-        position_corr = np.array([
-            [0.000, 0.056, 0.455, 0.411, -0.044, 0.271, 0.044, 0.147, 0.226, -0.424],  # QB
-            [0.056, 0.000, 0.007, 0.036, 0.050, 0.044, -0.099, 0.070, 0.142, -0.201],  # RB
-            [0.455, 0.007, 0.000, 0.030, -0.034, 0.147, 0.087, 0.127, -0.147, -0.234],  # WR
-            [0.411, 0.036, 0.030, 0.000, -0.124, 0.226, 0.069, 0.128, 0.129, -0.126],  # TE
-            [-0.044, 0.050, -0.034, -0.124, 0.000, -0.424, -0.201, -0.235, -0.126, -0.340],  # DST
-            [0.271, 0.044, 0.147, 0.226, -0.424, 0.000, 0.056, 0.456, 0.411, -0.044],  # OPPQB
-            [0.044, -0.099, 0.087, 0.069, -0.201, 0.056, 0.000, 0.008, 0.036, 0.050],  # OPPRB
-            [0.147, 0.070, 0.127, 0.128, -0.235, 0.456, 0.008, 0.000, 0.030, -0.033],  # OPPWR
-            [0.226, 0.142, -0.147, 0.129, -0.126, 0.411, 0.036, 0.030, 0.000, -0.124],  # OPPTE
-            [-0.424, -0.201, -0.234, -0.126, -0.340, -0.044, 0.050, -0.033, -0.124, 0.000],  # OPPDST
-        ])
-
-        for i in range(self.num_lineups):
-            if i % 10 == 0:
-                print(f"Generating lineup {i+1}/{self.num_lineups}...")
-            # Step 1: Reset the optimization problem
-            self.problem = LpProblem(f"NFL_DFS_Optimization_{i}", LpMaximize)
-
-            # Reinitialize constraints for the new problem
-            constraint_manager = ConstraintManager(
-                self.site, self.problem, self.players, self.lp_variables, self.config
-            )
-            self.problem.constraints.clear()  # Clears the existing constraints
-
-            constraint_manager.add_static_constraints()  # Add static constraints
-            constraint_manager.add_optional_constraints(max_ownership, min_fpts)
-
-            # Reapply all exclusion constraints from previous iterations
-            for constraint in exclusion_constraints:
-                self.problem += constraint
-
-            # Step 2: Generate random samples for fpts, boom, and ownership
-            random_projections = {}
-            for game, teams in players_by_game.items():
-                team_a_players = teams["team_a"]
-                team_b_players = teams["team_b"]
-                all_game_players = team_a_players + team_b_players
-
-                num_game_players = len(all_game_players)
-                game_corr = np.zeros((num_game_players, num_game_players))
-
-                # Map positions to indices in the correlation matrix
-                position_to_index = {
-                    "QB": 0, "RB": 1, "WR": 2, "TE": 3, "DST": 4,
-                    "OPPQB": 5, "OPPRB": 6, "OPPWR": 7, "OPPTE": 8, "OPPDST": 9,
-                }
-
-                # Build the correlation matrix for the current game
-                for i, player_i in enumerate(all_game_players):
-                    for j, player_j in enumerate(all_game_players):
-                        pos_i = player_i.position[0]  # Assume single position
-                        pos_j = player_j.position[0]
-                        team_i = player_i.team
-                        team_j = player_j.team
-
-                        if team_i == team_j:
-                            # Same team correlation
-                            game_corr[i, j] = position_corr[
-                                position_to_index[pos_i], position_to_index[pos_j]
-                            ]
-                        else:
-                            # Cross-team correlation
-                            game_corr[i, j] = position_corr[
-                                position_to_index[f"OPP{pos_i}"], position_to_index[f"OPP{pos_j}"]
-                            ]
-
-                # Ensure positive semi-definiteness
-                epsilon = 1e-10
-                game_corr = (game_corr + game_corr.T) / 2
-                np.fill_diagonal(game_corr, 1.0)
-                eigvals = np.linalg.eigvalsh(game_corr)
-                if np.min(eigvals) < 0:
-                    game_corr += (-np.min(eigvals) + epsilon) * np.eye(num_game_players)
-
-                # Generate correlated random values
-                mean_fpts = [player.fpts for player in all_game_players]
-                stddevs = [player.stddev * self.config["randomness_amount"] / 100 for player in all_game_players]
-                uncorrelated = np.random.normal(loc=mean_fpts, scale=stddevs, size=num_game_players)
-                L = np.linalg.cholesky(game_corr)
-                correlated = np.dot(L, uncorrelated)
-
-                # Apply the correlation adjustment
-                adjusted_projections = (1 - correlation_adjustment) * uncorrelated + correlation_adjustment * correlated
-
-                # Assign projections back to players
-                for i, player in enumerate(all_game_players):
-                    for position in player.position:
-                        random_projections[(player, position)] = adjusted_projections[i]
-
-            # Step 3: Calculate global max for scaling based on random samples
-            max_fpts = max(random_projections.values(), default=1)  # Avoid division by zero
-
-            # Step 4: Scale each variable to range [0, 1]
-            scaled_projections = {
-                key: value / max_fpts for key, value in random_projections.items()
-            }
-
-            def calculate_penalty(player):
-                exposure_percentage = exposure_tracker[player] / self.num_lineups
-                penalty_weight = exposure_penalty_weights.get(player.position[0], 0)
-                return penalty_weight * exposure_percentage
-
-            # Step 5: Set the scaled and penalized objective function
-            self.problem.setObjective(
-                lpSum(
-                    (scaled_projections[(player, position)] - calculate_penalty(player))
-                    * self.lp_variables[(player, position)]
-                    for player in self.players
-                    for position in player.position
-                )
+        if self.config.get("num_workers", 1) > 1 and not keep_lineups:
+            # Stage 1 runs once here; the workers share its limits
+            if self.baseline is None and not self.solve_baseline():
+                return Lineups(self.players)
+            return generate_lineups_parallel(
+                self.site, self.players, self.num_lineups, self.num_uniques, self.config, self.baseline
             )
-            self.problem.writeLP("problem.lp")
 
-            # Solve the problem
+        lineups = Lineups(self.players)  # Object to store all generated lineups
+        exclusion_constraints = []  # List to store uniqueness constraints
+
+        # Exposure counts and penalty weights per player, aligned to self.players
+        exposure_counts = np.zeros(len(self.players), dtype=np.float64)
+        exposure_penalty_weights = self.config.get("exposure_penalty_weights", {})
+        penalty_weights = np.array(
+            [exposure_penalty_weights.get(player.position[0], 0) for player in self.players], dtype=np.float64
+        )
+        # Build the static model once and only swap objective/add cuts per lineup
+        persistent_model = self.config.get("persistent_model", True)
+        # Only add uniqueness cuts for previous lineups a candidate actually comes too close to
+        lazy_uniqueness = self.config.get("lazy_uniqueness", True)
+        uniqueness = UniquenessManager(self.players, self.num_uniques)
+
+        def add_uniqueness_cut(lineup_index):
+            cut = self.uniqueness_cut(uniqueness.lineups[lineup_index])
+            self.problem += cut, f"Exclude_Lineup_{lineup_index}"
+            uniqueness.has_cut[lineup_index] = True
+            instrumentation.count("uniqueness_cuts")
+            if not persistent_model:
+                exclusion_constraints.append(cut)
+
+        # Stage 1: the projection-optimal lineup sets the fpts/ownership limits
+        if self.baseline is None and not self.solve_baseline():
+            return lineups
+        max_ownership = self.baseline["max_ownership"]
+        min_fpts = self.baseline["min_fpts"]
+
+        # Neighborhood pool mode: a few solves, each contributing a pool of nearby good lineups
+        if self.neighborhood_pool and not keep_lineups:
+            lineups = generate_lineups_neighborhood(self)
+            with instrumentation.timer("late_swap_order"):
+                self.adjust_roster_for_late_swap(lineups)
+            return lineups
+
+        # Lineups carried over from an earlier run count toward exposure and uniqueness
+        for lineup in keep_lineups or []:
+            lineups.add_lineup(lineup)
+            exposure_counts[[self.player_index[player] for player, _ in lineup]] += 1
+            uniqueness.add_lineup([player for player, _ in lineup])
+
+        # One row of correlated, randomized projections per lineup
+        projection_samples = self.sample_projections()
+
+        if persistent_model:
+            self.build_problem("NFL_DFS_Optimization_Lineups", max_ownership, min_fpts)
+
+        # Eager mode cuts every carried-over lineup up front
+        if not lazy_uniqueness:
+            for lineup_index, lineup_players in enumerate(uniqueness.lineups):
+                if persistent_model:
+                    add_uniqueness_cut(lineup_index)
+                else:
+                    exclusion_constraints.append(self.uniqueness_cut(lineup_players))
+                    uniqueness.has_cut[lineup_index] = True
+
+        self.iteration_timings = []
+        last_solved = None
+        for lineup_num in range(len(lineups), self.num_lineups):
+            instrumentation.iteration = lineup_num
+            if lineup_num % 10 == 0:
+                message = f"Generating lineup {lineup_num+1}/{self.num_lineups}..."
+                if self.iteration_timings:
+                    last = self.iteration_timings[-1]
+                    message += f" (build {last['build'] * 1000:.1f} ms, solve {last['solve'] * 1000:.1f} ms)"
+                print(message)
+            build_start = time.perf_counter()
+            if not persistent_model:
+                # Step 1: Reset the optimization problem
+                self.build_problem(f"NFL_DFS_Optimization_{lineup_num}", max_ownership, min_fpts)
+
+                # Reapply all exclusion constraints from previous iterations
+                for constraint in exclusion_constraints:
+                    self.problem += constraint
+
+            # Step 2: Take this lineup's row of the random samples
+            with instrumentation.timer("set_objective"):
+                projections = projection_samples[lineup_num]
+
+                # Step 3: Scale the samples to [0, 1] by their max
+                max_fpts = projections.max() if len(projections) else 1
+
+                # Step 4: Subtract the exposure penalty (updated in place below) and push one
+                # coefficient per variable
+                coefficients = projections / max_fpts - penalty_weights * exposure_counts / self.num_lineups
+                self.set_objective(coefficients[self.variable_players])
+            build_time = time.perf_counter() - build_start
+
+            # Solve the problem, re-solving with the cuts a candidate violates until it is unique
+            solve_start = time.perf_counter()
+            resolves = 0
             try:
-                self.problem.solve(plp.PULP_CBC_CMD(msg=False))
+                status = self.solve()
+                while status == "Optimal":
+                    violated = uniqueness.violated([player for player, _ in self.selected_keys()])
+                    if not violated:
+                        break
+                    for lineup_index in violated:
+                        add_uniqueness_cut(lineup_index)
+                    resolves += 1
+                    instrumentation.count("resolves")
+                    status = self.solve()
             except plp.PulpSolverError:
-                print(f"Infeasibility reached during optimization. Only {len(lineups.lineups)} lineups generated.")
+                print(f"Infeasibility reached during optimization. Only {len(lineups)} lineups generated.")
+                self.lp_dumper.after_solve(self.problem, lineup_num, "Error")
                 break
+            self.lp_dumper.after_solve(self.problem, lineup_num, status)
+            last_solved = lineup_num
+            self.iteration_timings.append(
+                {"build": build_time, "solve": time.perf_counter() - solve_start, "resolves": resolves}
+            )
 
-            if plp.LpStatus[self.problem.status] != "Optimal":
-                print(f"Infeasibility reached during optimization. Only {len(lineups.lineups)} lineups generated.")
+            if status != "Optimal":
+                print(f"Infeasibility reached during optimization. Only {len(lineups)} lineups generated.")
                 break
 
             # Step 6: Extract and save the final lineup
-            final_vars = [
-                key for key, var in self.lp_variables.items() if var.varValue == 1
-            ]
+            final_vars = self.selected_keys()
             final_lineup = [(player, position) for player, position in final_vars]
-            final_lineup = self.adjust_roster_for_late_swap(final_lineup)
             lineups.add_lineup(final_lineup)
+            instrumentation.count("lineups")
 
             # Step 7: Update player exposure
-            for player, position in final_lineup:
-                exposure_tracker[player] += 1
-
-            # Step 8: Add exclusion constraint for uniqueness
-            player_ids = [player.id for player, _ in final_vars]
-            player_keys_to_exclude = [
-                (p, pos) for p in self.players if p.id in player_ids for pos in p.position
-            ]
-            exclusion_constraint = lpSum(
-                self.lp_variables[(player, pos)] for player, pos in player_keys_to_exclude
-            ) <= len(final_vars) - self.num_uniques
-            exclusion_constraints.append(exclusion_constraint)
-
+            exposure_counts[[self.player_index[player] for player, _ in final_lineup]] += 1
+
+            # Step 8: Record the lineup for uniqueness checks; eager mode adds its cut right away
+            lineup_index = uniqueness.add_lineup([player for player, _ in final_vars])
+            if not lazy_uniqueness:
+                add_uniqueness_cut(lineup_index)
+
+        print(f"Uniqueness cuts in model: {uniqueness.num_cuts} for {len(uniqueness.lineups)} lineups")
+        instrumentation.iteration = None
+        self.lp_dumper.after_run(self.problem, last_solved)
+        self.print_timing_summary()
+        with instrumentation.timer("late_swap_order"):
+            self.adjust_roster_for_late_swap(lineups)
         return lineups
         
 
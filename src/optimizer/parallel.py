@@ -0,0 +1,135 @@
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from data.player_pool import POSITIONS
+from lineups.lineups import Lineups
+
+
+def _generate_lineups_worker(site, players, num_lineups, num_uniques, config, baseline):
+    """
+    Worker entry point: build an independent optimizer with the shared stage-1 baseline and
+    generate a share of the lineups.
+    :return: (lineups as (player index, position) pairs into the players list, the
+        scaled sampled objective each lineup was solved for).
+    """
+    from optimizer.optimizer import Optimizer
+
+    player_index = {player: i for i, player in enumerate(players)}
+    optimizer = Optimizer(site, players, num_lineups, num_uniques, config)
+    optimizer.baseline = baseline
+    lineups = optimizer.run()
+    index_map = np.array([player_index[player] for player in lineups.players], dtype=np.int64)
+    rows = index_map[lineups.rows]
+
+    # Lineup k was solved on sample row k; the seeded sampler replays the same rows
+    samples = optimizer.sample_projections()[:len(rows)]
+    scaled = samples / np.maximum(samples.max(axis=1, keepdims=True), 1e-9)
+    scores = np.take_along_axis(scaled, rows, axis=1).sum(axis=1)
+    return [
+        [(index, POSITIONS[pos]) for index, pos in zip(lineup_rows, positions)]
+        for lineup_rows, positions in zip(rows.tolist(), lineups.positions.tolist())
+    ], scores.tolist()
+
+
+def reconcile_lineups(candidates, scores, players, num_lineups, num_uniques, exposure_penalty_weights):
+    """
+    Greedily select lineups from the merged worker output. Each step takes the candidate
+    with the best objective minus exposure penalty, given the exposure of the lineups
+    already accepted, and skips candidates closer than num_uniques players to any
+    accepted lineup.
+    :param candidates: List of lineups as (player index, position) pairs.
+    :param scores: Objective value of each candidate under the scaled (sampled) projections
+        it was solved for, so randomized lineups keep the rank that produced them.
+    :param players: List of Player objects the indices refer to.
+    :param num_lineups: Number of lineups to select.
+    :param num_uniques: Minimum unique players between lineups.
+    :param exposure_penalty_weights: Penalty weight per primary position.
+    :return: Indices into candidates of the selected lineups, in selection order.
+    """
+    if not candidates:
+        return []
+
+    num_players = len(players)
+    selection = np.zeros((len(candidates), num_players), dtype=np.int32)
+    for row, lineup in enumerate(candidates):
+        selection[row, [index for index, _ in lineup]] = 1
+    lineup_size = selection.sum(axis=1)
+
+    penalty_weights = np.array(
+        [exposure_penalty_weights.get(player.position[0], 0) for player in players], dtype=np.float64
+    )
+    scores = np.array(scores, dtype=np.float64)
+    max_overlap = np.zeros(len(candidates), dtype=np.int32)
+    available = np.ones(len(candidates), dtype=bool)
+
+    selected = []
+    while len(selected) < num_lineups:
+        eligible = available & (lineup_size - max_overlap >= num_uniques)
+        if not eligible.any():
+            break
+        best = int(np.argmax(np.where(eligible, scores, -np.inf)))
+        selected.append(best)
+        available[best] = False
+
+        # Each accepted lineup raises the penalty on its players and the overlap of similar lineups
+        chosen = selection[best].astype(bool)
+        scores -= selection[:, chosen] @ (penalty_weights[chosen] / num_lineups)
+        max_overlap = np.maximum(max_overlap, selection[:, chosen].sum(axis=1))
+
+    return selected
+
+
+def generate_lineups_parallel(site, players, num_lineups, num_uniques, config, baseline):
+    """
+    Split lineup generation across a process pool and reconcile the merged results.
+    Each worker gets its own solver model and its own RNG stream spawned from "random_seed".
+    Workers oversample by "parallel_oversample" so reconciliation has lineups to spare.
+    :param baseline: Stage-1 baseline (Optimizer.baseline) shared by every worker.
+    :return: Lineups instance containing the reconciled lineups.
+    """
+    num_workers = config.get("num_workers", 1)
+    oversample = config.get("parallel_oversample", 1.25)
+    lineups_per_worker = math.ceil(num_lineups * oversample / num_workers)
+
+    seeds = [
+        int(child.generate_state(1)[0])
+        for child in np.random.SeedSequence(config.get("random_seed")).spawn(num_workers)
+    ]
+    worker_configs = [
+        dict(config, num_workers=1, random_seed=seed, save_samples_path=None, load_samples_path=None)
+        for seed in seeds
+    ]
+
+    print(f"Generating {lineups_per_worker} lineups on each of {num_workers} workers...")
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=num_workers) as executor:
+        futures = [
+            executor.submit(_generate_lineups_worker, site, players, lineups_per_worker, num_uniques, worker_config, baseline)
+            for worker_config in worker_configs
+        ]
+        worker_results = [future.result() for future in futures]
+    print(f"Workers finished in {time.perf_counter() - start:.2f} s")
+
+    # Interleave worker output so no single worker's lineups dominate ties
+    merged = [
+        candidate
+        for round_lineups in zip(*[
+            list(zip(*result)) + [None] * (lineups_per_worker - len(result[0])) for result in worker_results
+        ])
+        for candidate in round_lineups
+        if candidate is not None
+    ]
+    candidates = [lineup for lineup, _ in merged]
+    selected = reconcile_lineups(
+        candidates, [score for _, score in merged], players, num_lineups, num_uniques, config.get("exposure_penalty_weights", {})
+    )
+    if len(selected) < num_lineups:
+        print(f"Only {len(selected)} unique lineups after reconciliation of {len(candidates)} candidates.")
+
+    lineups = Lineups(players)
+    for row in selected:
+        lineups.add_lineup([(players[index], pos) for index, pos in candidates[row]])
+    return lineups
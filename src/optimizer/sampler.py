@@ -0,0 +1,82 @@
+import numpy as np
+
+from data.player_pool import PlayerPool
+from optimizer.correlation import GameCorrelationCache, POSITION_CORR
+
+
+class ProjectionSampler:
+    """
+    Draws correlated, adjusted projections for every player in one vectorized pass.
+    Columns of the sample matrix follow the order of the players list. Games form the
+    blocks of a block-diagonal Cholesky factor; players without a game are sampled
+    independently.
+    """
+
+    def __init__(self, players, randomness_amount, correlation_adjustment=0.0, seed=None, position_corr=POSITION_CORR):
+        self.players = players
+        self.correlation_adjustment = correlation_adjustment
+        self.rng = np.random.default_rng(seed)
+
+        pool = PlayerPool.from_players(players)
+        self.mean = pool.fpts
+        self.stddev = pool.stddev * randomness_amount / 100
+
+        # (column indices, Cholesky block) per game
+        correlation_cache = GameCorrelationCache(players, randomness_amount, position_corr)
+        self.blocks = [
+            (np.array([pool.index[player] for player in game["players"]]), game["cholesky"])
+            for game in correlation_cache.games.values()
+        ]
+
+    def sample(self, num_samples):
+        """
+        Draw num_samples full-slate projection sets.
+        :param num_samples: Number of rows to draw (one per lineup).
+        :return: (num_samples, num_players) array of adjusted projections.
+        """
+        uncorrelated = self.rng.normal(
+            loc=self.mean, scale=self.stddev, size=(num_samples, len(self.players))
+        )
+        correlated = uncorrelated.copy()
+        for columns, cholesky in self.blocks:
+            correlated[:, columns] = uncorrelated[:, columns] @ cholesky.T
+        return (1 - self.correlation_adjustment) * uncorrelated + self.correlation_adjustment * correlated
+
+    def sample_outcomes(self, num_samples):
+        """
+        Draw num_samples correlated full-slate outcomes for the contest simulator. The
+        Cholesky factor is applied to the centered standard-normal draws, so every player
+        keeps its mean and stddev and the game correlations hold in full, whatever
+        correlation_adjustment is: mean + stddev * (L z).
+        :param num_samples: Number of outcomes to draw.
+        :return: (num_samples, num_players) array of fantasy points.
+        """
+        deviations = self.rng.standard_normal(size=(num_samples, len(self.players)))
+        for columns, cholesky in self.blocks:
+            # The positive-definite repair inflates the diagonal; unit rows keep unit variance
+            unit_rows = cholesky / np.linalg.norm(cholesky, axis=1, keepdims=True)
+            deviations[:, columns] = deviations[:, columns] @ unit_rows.T
+        return self.mean + self.stddev * deviations
+
+    @staticmethod
+    def save(path, samples):
+        """
+        Save a sample matrix so a run can be replayed.
+        """
+        np.save(path, samples)
+
+    def load(self, path, num_samples):
+        """
+        Load a saved sample matrix and check it matches this player pool.
+        :param path: Path of the .npy file written by save().
+        :param num_samples: Minimum number of rows required.
+        :return: (num_samples, num_players) array of projections.
+        """
+        samples = np.load(path)
+        if samples.ndim != 2 or samples.shape[1] != len(self.players):
+            raise ValueError(
+                f"Sample file {path} has shape {samples.shape}, expected (*, {len(self.players)}) for this player pool."
+            )
+        if samples.shape[0] < num_samples:
+            raise ValueError(f"Sample file {path} has {samples.shape[0]} rows, {num_samples} required.")
+        return samples[:num_samples]
@@ -0,0 +1,210 @@
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pulp as plp
+
+try:
+    import highspy
+except ImportError:  # HiGHS backend is optional
+    highspy = None
+
+
+class SolverBackend(ABC):
+    """
+    Base class for the engines that solve the optimizer's PuLP problem.
+    A backend writes the solution back onto the PuLP variables (var.varValue)
+    and returns the PuLP status string, so callers can keep reading the model
+    the same way regardless of which engine solved it.
+    """
+    name = None
+    sets_problem_objective = True  # set_objective also updates problem.objective
+
+    def __init__(self, config):
+        self.config = config
+        self.warm_start = config.get("solver_warm_start", True)
+
+    def set_objective(self, problem, variables, coefficients):
+        """
+        Set a linear objective given as a coefficient vector aligned to variables.
+        :param problem: The PuLP problem to solve next.
+        :param variables: LpVariables in a fixed order.
+        :param coefficients: NumPy array with one coefficient per variable.
+        """
+        problem.setObjective(plp.LpAffineExpression(zip(variables, coefficients.tolist())))
+
+    @abstractmethod
+    def solve(self, problem):
+        """
+        Solve the problem and write the solution onto its variables.
+        :param problem: The PuLP problem to solve.
+        :return: PuLP status string, e.g. "Optimal".
+        """
+
+
+class CbcBackend(SolverBackend):
+    """
+    CBC through PuLP's command line interface. Starts a new process and round-trips
+    the model through a temp file on every solve.
+    """
+    name = "cbc"
+
+    def solve(self, problem):
+        problem.solve(plp.PULP_CBC_CMD(msg=False, warmStart=self.warm_start))
+        return plp.LpStatus[problem.status]
+
+
+class HighsBackend(SolverBackend):
+    """
+    In-process HiGHS engine. The PuLP problem is copied into a HiGHS model once;
+    later solves on the same problem only push the new objective coefficients, the
+    variable bounds and any constraints appended since the previous solve, and start
+    from the previous solution as an incumbent. A different problem object triggers a full reload.
+    Objectives passed to set_objective go straight to HiGHS as a cost vector and are not
+    copied onto problem.objective. On the bundled slate it runs 2-3x slower than CBC
+    (benchmarks/bench_solvers.py), so "cbc" stays the default.
+    """
+    name = "highs"
+    sets_problem_objective = False
+
+    def __init__(self, config):
+        super().__init__(config)
+        if highspy is None:
+            raise ImportError("The 'highs' solver backend requires the highspy package (pip install highspy).")
+        self.highs = None
+        self._problem = None
+        self._columns = {}  # LpVariable -> column index
+        self._variables = []
+        self._num_rows = 0
+        self._last_solution = None
+        self._objective = None  # (problem, problem.objective, variables, coefficients) from set_objective
+        self._objective_columns = None  # (variables, column of each variable)
+
+    def set_objective(self, problem, variables, coefficients):
+        # Remember problem.objective too, so a later problem.setObjective takes precedence
+        self._objective = (problem, problem.objective, variables, np.asarray(coefficients, dtype=np.float64))
+
+    def _load(self, problem):
+        self.highs = highspy.Highs()
+        self.highs.setOptionValue("output_flag", False)
+        self._problem = problem
+        self._variables = problem.variables()
+        self._columns = {var: col for col, var in enumerate(self._variables)}
+        self._num_rows = 0
+        self._last_solution = None
+        self._objective_columns = None
+
+        self.highs.addVars(len(self._variables), *self._bounds())
+
+        integer_cols = np.array(
+            [col for col, var in enumerate(self._variables) if var.cat == plp.LpInteger], dtype=np.int32
+        )
+        if len(integer_cols):
+            self.highs.changeColsIntegrality(
+                len(integer_cols), integer_cols,
+                np.full(len(integer_cols), highspy.HighsVarType.kInteger.value, dtype=np.uint8),
+            )
+
+        sense = highspy.ObjSense.kMaximize if problem.sense == plp.LpMaximize else highspy.ObjSense.kMinimize
+        self.highs.changeObjectiveSense(sense)
+
+    def _bounds(self):
+        lower = np.array([-np.inf if var.lowBound is None else var.lowBound for var in self._variables], dtype=np.float64)
+        upper = np.array([np.inf if var.upBound is None else var.upBound for var in self._variables], dtype=np.float64)
+        return lower, upper
+
+    def _set_bounds(self):
+        # Late swap fixes and releases players through variable bounds between solves
+        lower, upper = self._bounds()
+        self.highs.changeColsBounds(len(lower), np.arange(len(lower), dtype=np.int32), lower, upper)
+
+    def _add_new_rows(self, problem):
+        """
+        Push constraints appended to the PuLP problem since the last solve.
+        :return: False if a new row references a variable the HiGHS model does not have.
+        """
+        constraints = list(problem.constraints.values())[self._num_rows:]
+        if not constraints:
+            return True
+
+        lower, upper, starts, indices, values = [], [], [], [], []
+        for constraint in constraints:
+            starts.append(len(indices))
+            for var, coefficient in constraint.items():
+                if var not in self._columns:
+                    return False
+                indices.append(self._columns[var])
+                values.append(coefficient)
+            rhs = -constraint.constant
+            lower.append(rhs if constraint.sense in (plp.LpConstraintGE, plp.LpConstraintEQ) else -np.inf)
+            upper.append(rhs if constraint.sense in (plp.LpConstraintLE, plp.LpConstraintEQ) else np.inf)
+
+        self.highs.addRows(
+            len(constraints),
+            np.array(lower, dtype=np.float64),
+            np.array(upper, dtype=np.float64),
+            len(indices),
+            np.array(starts, dtype=np.int32),
+            np.array(indices, dtype=np.int32),
+            np.array(values, dtype=np.float64),
+        )
+        self._num_rows += len(constraints)
+        return True
+
+    def _set_objective(self, problem):
+        costs = np.zeros(len(self._variables), dtype=np.float64)
+        stored = self._objective
+        if stored is not None and stored[0] is problem and stored[1] is problem.objective:
+            _, _, variables, coefficients = stored
+            if self._objective_columns is None or self._objective_columns[0] is not variables:
+                self._objective_columns = (
+                    variables, np.array([self._columns[var] for var in variables], dtype=np.int64)
+                )
+            costs[self._objective_columns[1]] = coefficients
+        else:
+            for var, coefficient in problem.objective.items():
+                costs[self._columns[var]] = coefficient
+        self.highs.changeColsCost(len(costs), np.arange(len(costs), dtype=np.int32), costs)
+
+    def solve(self, problem):
+        if problem is not self._problem or len(problem.constraints) < self._num_rows:
+            self._load(problem)
+        if not self._add_new_rows(problem):
+            self._load(problem)
+            self._add_new_rows(problem)
+        self._set_objective(problem)
+        self._set_bounds()
+
+        if self.warm_start and self._last_solution is not None:
+            self.highs.setSolution(
+                len(self._last_solution), np.arange(len(self._last_solution), dtype=np.int32), self._last_solution
+            )
+
+        self.highs.run()
+        if self.highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            problem.assignStatus(plp.LpStatusInfeasible)
+            return plp.LpStatus[problem.status]
+
+        solution = np.array(self.highs.getSolution().col_value, dtype=np.float64)
+        self._last_solution = solution
+        for var, value in zip(self._variables, solution):
+            var.varValue = round(value) if var.cat == plp.LpInteger else value
+        problem.assignStatus(plp.LpStatusOptimal)
+        return plp.LpStatus[problem.status]
+
+
+SOLVER_BACKENDS = {
+    CbcBackend.name: CbcBackend,
+    HighsBackend.name: HighsBackend,
+}
+
+
+def get_solver_backend(config):
+    """
+    Create the solver backend selected by the "solver_backend" config key.
+    :param config: The loaded configuration dictionary.
+    :return: A SolverBackend instance.
+    """
+    name = config.get("solver_backend", "cbc")
+    if name not in SOLVER_BACKENDS:
+        raise ValueError(f"Unknown solver backend '{name}'. Available backends: {', '.join(SOLVER_BACKENDS)}")
+    return SOLVER_BACKENDS[name](config)
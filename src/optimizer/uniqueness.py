@@ -0,0 +1,47 @@
+class UniquenessManager:
+    """
+    Keeps previously generated lineups as player bitsets so a candidate lineup can be
+    checked against all of them with a few integer ANDs. Uniqueness cuts are only built
+    for the lineups a candidate actually comes too close to.
+    """
+
+    def __init__(self, players, num_uniques):
+        self.num_uniques = num_uniques
+        self.player_bits = {player: 1 << i for i, player in enumerate(players)}
+        self.masks = []  # One bitset per previous lineup
+        self.lineups = []  # Players of each previous lineup, used to build its cut
+        self.has_cut = []  # Whether the lineup's cut is already in the model
+
+    def _mask(self, lineup_players):
+        mask = 0
+        for player in lineup_players:
+            mask |= self.player_bits[player]
+        return mask
+
+    def add_lineup(self, lineup_players):
+        """
+        Record an accepted lineup.
+        :param lineup_players: Players in the lineup.
+        :return: Index of the lineup.
+        """
+        self.masks.append(self._mask(lineup_players))
+        self.lineups.append(list(lineup_players))
+        self.has_cut.append(False)
+        return len(self.masks) - 1
+
+    def violated(self, lineup_players):
+        """
+        Find previous lineups sharing more than (size - num_uniques) players with the candidate.
+        :param lineup_players: Players in the candidate lineup.
+        :return: Indices of the violated previous lineups.
+        """
+        mask = self._mask(lineup_players)
+        return [
+            index
+            for index, previous in enumerate(self.masks)
+            if (mask & previous).bit_count() > len(self.lineups[index]) - self.num_uniques
+        ]
+
+    @property
+    def num_cuts(self):
+        return sum(self.has_cut)